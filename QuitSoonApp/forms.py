@@ -2,6 +2,7 @@
 
 import unicodedata
 import datetime
+import io
 
 from django import forms
 from django.contrib.auth import authenticate
@@ -9,10 +10,12 @@ from django.contrib.auth.forms import UserCreationForm, UsernameField, Authentic
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
 from django.utils.translation import gettext, gettext_lazy as _
 from django.core.exceptions import NON_FIELD_ERRORS
 
 from QuitSoonApp.models import UserProfile, Paquet, ConsoCig, Alternative, ConsoAlternative
+from QuitSoonApp.modules import LastUsedManager, CatalogCache
 
 
 class RegistrationForm(UserCreationForm):
@@ -64,7 +67,7 @@ class PaquetFormCreation(PaquetForm):
 
     class Meta:
         model = Paquet
-        fields = ['type_cig', 'brand', 'qt_paquet', 'price']
+        fields = ['type_cig', 'brand', 'qt_paquet', 'price', 'nicotine']
 
     def clean(self):
         cleaned_data = super(PaquetFormCreation, self).clean()
@@ -138,6 +141,27 @@ class SmokeForm(forms.Form):
         widget=forms.CheckboxInput()
     )
 
+    # bulk mode, several cigarettes per day until date_end
+    MAX_BULK_CIG = 100
+    MAX_BULK_DAYS = 31
+
+    nb_cig = forms.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=MAX_BULK_CIG,
+        label='Nombre de clopes (par jour)',
+        widget=forms.NumberInput(
+            attrs={'class':"form-control"},
+    ))
+
+    date_end = forms.DateField(
+        required=False,
+        label="Jusqu'au",
+        widget=forms.DateInput(
+            attrs={'class':"form-control",
+                    'type':'date'},
+    ))
+
     type_cig_field = forms.ChoiceField(
         required=True,
         choices=[],
@@ -163,15 +187,19 @@ class SmokeForm(forms.Form):
         self.user = user
         super(SmokeForm, self).__init__(*args, **kwargs)
 
-        self.user_packs = Paquet.objects.filter(user=self.user, display=True)
-        self.user_conso = ConsoCig.objects.filter(user=self.user)
+        # user displayed packs from catalog cache, grouped by type_cig in memory
+        self.user_packs = CatalogCache(self.user).packs
+        self.packs_per_type = {}
+        for pack in self.user_packs:
+            self.packs_per_type.setdefault(pack.type_cig, []).append(pack)
         self.lastsmoke = self.last_smoke
 
         TYPE_CHOICES = []
-        for pack in self.user_packs.order_by('type_cig').distinct('type_cig'):
-            TYPE_CHOICES.append((pack.type_cig, pack.get_type_cig_display))
-            if pack.type_cig == self.lastsmoke.type_cig:
-                self.initial['type_cig_field'] = (pack.type_cig, pack.get_type_cig_display)
+        for type_cig in sorted(self.packs_per_type):
+            pack = self.packs_per_type[type_cig][0]
+            TYPE_CHOICES.append((type_cig, pack.get_type_cig_display()))
+            if self.lastsmoke and type_cig == self.lastsmoke.type_cig:
+                self.initial['type_cig_field'] = (type_cig, pack.get_type_cig_display())
         TYPE_CHOICES = tuple(TYPE_CHOICES)
         self.fields['type_cig_field'].choices = TYPE_CHOICES
 
@@ -181,35 +209,72 @@ class SmokeForm(forms.Form):
         ROL_CHOICES = self.config_field('rol_pack_field', 'ROL')
         self.fields['rol_pack_field'].choices = ROL_CHOICES
 
-    @property
+    @cached_property
     def last_smoke(self):
-        """get user last smoke or last created pack"""
-        if self.user_conso:
-            lastsmoke = self.user_conso.last().paquet
-            if lastsmoke:
-                return lastsmoke
-            else:
-                # get the last cig not given
-                for conso in self.user_conso.order_by('-date_cig', '-time_cig'):
-                    if conso.paquet:
-                        return conso.paquet
-                    else:
-                        pass
-                return Paquet.objects.filter(user=self.user, display=True).last()
-        else:
-            return Paquet.objects.filter(user=self.user, display=True).last()
-
+        """get pack of user last not given smoke or last created pack"""
+        lastpack = LastUsedManager(self.user).last_used.paquet
+        if lastpack:
+            return lastpack
+        if self.user_packs:
+            return self.user_packs[-1]
+        return None
 
     def config_field(self, field, type):
         """configurate field depending of type_cig"""
         CHOICES = []
-        for pack in self.user_packs.filter(type_cig=type):
+        for pack in self.packs_per_type.get(type, []):
             display = "{} /{}{}".format(pack.brand, pack.qt_paquet, pack.unit)
             CHOICES.append((pack.id, display))
             if pack.brand == self.lastsmoke.brand and pack.qt_paquet == self.lastsmoke.qt_paquet:
                 self.initial[field] = (pack.id, display)
         return tuple(CHOICES)
 
+    def clean(self):
+        """Make sure bulk date range is valid"""
+        cleaned_data = super().clean()
+        date_smoke = cleaned_data.get('date_smoke')
+        date_end = cleaned_data.get('date_end')
+        if date_smoke and date_end:
+            if date_end < date_smoke:
+                raise forms.ValidationError("La date de fin doit être postérieure à la date de début")
+            if (date_end - date_smoke).days >= self.MAX_BULK_DAYS:
+                raise forms.ValidationError(
+                    "Vous ne pouvez pas renseigner plus de {} jours à la fois".format(self.MAX_BULK_DAYS))
+        return cleaned_data
+
+    @property
+    def selected_pack(self):
+        """pack selected in cleaned data, found in user packs already loaded"""
+        if self.cleaned_data.get('given_field'):
+            return None
+        field = '{}_pack_field'.format(self.cleaned_data.get('type_cig_field', '').lower())
+        for pack in self.user_packs:
+            if str(pack.id) == self.cleaned_data.get(field):
+                return pack
+        return None
+
+
+class HistoryImportForm(forms.Form):
+    """Form uploading a csv file of cigarettes history"""
+
+    csv_file = forms.FileField(
+        required=True,
+        label='Fichier CSV (date,heure,paquet)',
+        )
+
+    # spreadsheets often export csv files in Windows-1252
+    ENCODINGS = ['utf-8-sig', 'cp1252']
+
+    def clean_csv_file(self):
+        """decoded csv file, ready for HistoryImport"""
+        content = self.cleaned_data['csv_file'].read()
+        for encoding in self.ENCODINGS:
+            try:
+                return io.StringIO(content.decode(encoding), newline='')
+            except UnicodeDecodeError:
+                pass
+        raise forms.ValidationError("Encodage du fichier non reconnu, enregistrez-le en UTF-8")
+
 
 class HealthForm(forms.Form):
     """Class generating a form for user healthy action"""
@@ -284,8 +349,15 @@ class HealthForm(forms.Form):
         self.user = user
         super(HealthForm, self).__init__(*args, **kwargs)
 
-        self.user_alternatives = Alternative.objects.filter(user=self.user, display=True)
-        self.user_conso = ConsoAlternative.objects.filter(user=self.user)
+        # snapshot of user alternatives (from catalog cache) and of his last healthy actions
+        self.alternatives = {
+            alternative.id: alternative
+            for alternative in CatalogCache(self.user).alternatives
+            }
+        self.user_alternatives = [
+            alternative for alternative in self.alternatives.values() if alternative.display]
+        self.last_used = LastUsedManager(self.user).last_used
+        self.last_alternatives = {}
 
         #########################################################################################
         # define type alternative configuration (choices + initial)
@@ -293,15 +365,22 @@ class HealthForm(forms.Form):
         # initial = last alternative type_activity or last alternative type_alternative(if =='Su')
         #########################################################################################
         TYPE_ALTERNATIVE_CHOICES = []
-        for alternative in self.user_alternatives.filter(type_alternative='Ac').order_by('type_activity').distinct('type_activity'):
+        last_alternative = self.last_alternative()
+        activities = {
+            alternative.type_activity: alternative
+            for alternative in reversed(self.user_alternatives)
+            if alternative.type_alternative == 'Ac'
+            }
+        for type_activity in sorted(activities):
             # include user activity types
-            TYPE_ALTERNATIVE_CHOICES.append((alternative.type_activity, alternative.get_type_activity_display))
-            if alternative.type_activity == self.last_alternative().type_activity:
-                self.initial['type_alternative_field'] = (alternative.type_activity, alternative.get_type_activity_display)
+            alternative = activities[type_activity]
+            TYPE_ALTERNATIVE_CHOICES.append((type_activity, alternative.get_type_activity_display()))
+            if type_activity == last_alternative.type_activity:
+                self.initial['type_alternative_field'] = (type_activity, alternative.get_type_activity_display())
         # if user has substituts, choice substitut
-        if Alternative.objects.filter(user=self.user, type_alternative='Su'):
+        if any(alternative.type_alternative == 'Su' for alternative in self.alternatives.values()):
             TYPE_ALTERNATIVE_CHOICES.append(('Su', 'Substitut'))
-        if self.last_alternative().type_alternative == 'Su':
+        if last_alternative and last_alternative.type_alternative == 'Su':
             self.initial['type_alternative_field'] = ('Su', 'Substitut')
         # define type_alternative_choices
         TYPE_ALTERNATIVE_CHOICES = tuple(TYPE_ALTERNATIVE_CHOICES)
@@ -324,26 +403,33 @@ class HealthForm(forms.Form):
         self.fields['su_field'].choices = SU_FIELD_CHOICES
 
     def last_alternative(self, type_alternative=None, type_activity=None):
-        """get user last healthy action or last created alternative"""
+        """get user last healthy action or last created alternative, memoized per type"""
+        key = (type_alternative, type_activity)
+        if key not in self.last_alternatives:
+            self.last_alternatives[key] = self.get_last_alternative(type_alternative, type_activity)
+        return self.last_alternatives[key]
+
+    def get_last_alternative(self, type_alternative=None, type_activity=None):
         if type_alternative == 'Su':
-            conso = self.user_conso.filter(alternative__type_alternative=type_alternative)
+            lastalternative = self.last_used.alternative_su
         elif type_alternative == 'Ac':
-            conso = self.user_conso.filter(alternative__type_activity=type_activity)
+            field = LastUsedManager.ACTIVITY_FIELDS.get(type_activity)
+            lastalternative = getattr(self.last_used, field) if field else None
         else:
             # get last conso unrelated to type
-            conso = self.user_conso
+            lastalternative = self.last_used.alternative
 
-        if conso:
-            lastalternative = conso.last().alternative
-            if lastalternative:
-                return lastalternative
+        if lastalternative:
+            return lastalternative
         else:
-            filter = self.user_alternatives
-            if type_alternative:
-                filter = self.user_alternatives.filter(type_alternative=type_alternative)
-            if type_activity:
-                filter = self.user_alternatives.filter(type_activity=type_activity)
-            return filter.last()
+            # last created alternative of this type
+            for alternative in reversed(self.user_alternatives):
+                if type_activity:
+                    if alternative.type_activity == type_activity:
+                        return alternative
+                elif not type_alternative or alternative.type_alternative == type_alternative:
+                    return alternative
+            return None
 
     def config_field(self, field_name, type_alternative, type_activity=None):
         """
@@ -353,21 +439,36 @@ class HealthForm(forms.Form):
         """
         CHOICES = []
         if type_alternative == 'Ac':
-            for alternative in self.user_alternatives.filter(type_activity=type_activity):
+            last_alternative = self.last_alternative(type_alternative, type_activity)
+            for alternative in self.user_alternatives:
+                if alternative.type_activity != type_activity:
+                    continue
                 CHOICES.append((alternative.id, alternative.activity))
-                if alternative.activity == self.last_alternative(type_alternative, type_activity).activity:
+                if alternative.activity == last_alternative.activity:
                     self.initial[field_name] = (alternative.id, alternative.activity)
             return tuple(CHOICES)
         elif type_alternative == 'Su':
-            for alternative in self.user_alternatives.filter(type_alternative=type_alternative):
+            last_alternative = self.last_alternative(type_alternative)
+            for alternative in self.user_alternatives:
+                if alternative.type_alternative != type_alternative:
+                    continue
                 display = "{} ({}mg)".format(alternative.get_substitut_display(), alternative.nicotine)
                 CHOICES.append((alternative.id, display))
-                if alternative.substitut == self.last_alternative(type_alternative).substitut and alternative.nicotine == self.last_alternative(type_alternative).nicotine:
+                if alternative.substitut == last_alternative.substitut and alternative.nicotine == last_alternative.nicotine:
                     self.initial[field_name] = (alternative.id, display)
             return tuple(CHOICES)
         else:
             return None
 
+    @property
+    def selected_alternative(self):
+        """alternative selected in cleaned data, found in user alternatives already loaded"""
+        field = '{}_field'.format(self.cleaned_data.get('type_alternative_field', '').lower())
+        try:
+            return self.alternatives.get(int(self.cleaned_data.get(field)))
+        except (TypeError, ValueError):
+            return None
+
     def clean(self):
         """Clean all_field and specialy make sure total duration in not none for activities"""
         cleaned_data = super().clean()
@@ -386,8 +487,9 @@ class HealthForm(forms.Form):
             id_subsitut = int(cleaned_data.get('su_field'))
             if type_alternative == 'Su':
                 # if a Ecig substitut alternative is selected in su_field
-                if id_subsitut:
-                    if Alternative.objects.get(id=id_subsitut).substitut.upper() == 'ECIG':
+                substitut = self.alternatives.get(id_subsitut)
+                if substitut:
+                    if substitut.substitut.upper() == 'ECIG':
                         # check if at least one choice has been selected
                         if ecig_data == []:
                             raise forms.ValidationError("""
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+"""
+Command precomputing SmokeStats reports of all users into the stats cache,
+by chunks of users dispatched across worker processes
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.dateparse import parse_date
+
+from QuitSoonApp.models import UserProfile
+from QuitSoonApp.modules import StatsCache
+
+
+# cache entries of a user: data version, stats, catalog and forecast
+KEYS_PER_USER = 4
+
+
+def compute_chunk(user_ids, lastday):
+    """compute and cache stats of a chunk of users, return number of users done"""
+    profiles = UserProfile.objects.filter(user_id__in=user_ids).select_related('user')
+    for profile in profiles:
+        stats_cache = StatsCache(profile.user)
+        stats_cache.set_stats(lastday, StatsCache.compute_stats(profile.user, lastday))
+    return len(profiles)
+
+
+class Command(BaseCommand):
+    help = "Compute stats of all users and store them in the stats cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes (1 computes in current process)",
+            )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help="Number of users computed by a worker at once",
+            )
+        parser.add_argument(
+            '--date',
+            type=parse_date,
+            default=None,
+            help="Last day of stats (YYYY-MM-DD), today by default",
+            )
+
+    def handle(self, *args, **options):
+        backend = settings.CACHES['stats']['BACKEND']
+        if backend not in settings.SHARED_CACHE_BACKENDS:
+            raise CommandError(
+                "Stats cache {} is local to this process, its results would be lost: "
+                "use STATS_CACHE_BACKEND=file, db or memcached".format(backend))
+        lastday = options['date'] or date.today()
+        chunk_size = options['chunk_size']
+        user_ids = list(UserProfile.objects.order_by('user_id').values_list('user_id', flat=True))
+        cache = caches['stats']
+        if not isinstance(cache, BaseMemcachedCache) and cache._max_entries < len(user_ids) * KEYS_PER_USER:
+            # a culled cache would mostly evict the stats just computed
+            raise CommandError(
+                "Stats cache holds {} entries, {} users need {}: "
+                "raise STATS_CACHE_MAX_ENTRIES".format(
+                    cache._max_entries, len(user_ids), len(user_ids) * KEYS_PER_USER))
+        chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+
+        if options['workers'] <= 1:
+            nb_users = sum(compute_chunk(chunk, lastday) for chunk in chunks)
+        else:
+            # close our connections before forking,
+            # so that each worker opens its own DB connection
+            connections.close_all()
+            with ProcessPoolExecutor(
+                    max_workers=options['workers'],
+                    mp_context=multiprocessing.get_context('fork'),
+                    ) as executor:
+                nb_users = sum(executor.map(compute_chunk, chunks, [lastday] * len(chunks)))
+
+        self.stdout.write(self.style.SUCCESS(
+            "Stats computed for {} users until {}".format(nb_users, lastday)))
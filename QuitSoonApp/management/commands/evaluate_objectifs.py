@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+
+"""
+Command evaluating all users objectives ended since last run, meant to be
+scheduled (cron) e.g. every hour
+"""
+
+from django.core.management.base import BaseCommand
+
+from QuitSoonApp.modules import ObjectifEvaluation
+
+
+class Command(BaseCommand):
+    help = "Close ended objectives of all users and tell if they have been respected"
+
+    def handle(self, *args, **options):
+        nb_objectifs = ObjectifEvaluation().evaluate()
+        self.stdout.write(self.style.SUCCESS("{} objectives evaluated".format(nb_objectifs)))
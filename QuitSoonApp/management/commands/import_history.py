@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+"""
+Command importing a user cigarettes history from a csv file (date,time,pack)
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from QuitSoonApp.modules import HistoryImport
+
+
+class Command(BaseCommand):
+    help = "Import cigarettes of a user from a csv file with date,time,pack rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('csv_file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of rows inserted per query",
+            )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError("Unknown user '{}'".format(options['username']))
+        with open(options['csv_file'], encoding='utf-8-sig', newline='') as csv_file:
+            history = HistoryImport(user, csv_file, options['batch_size'])
+            history.run()
+        for line_number, error in history.errors:
+            self.stderr.write("line {}: {}".format(line_number, error))
+        if history.errors:
+            raise CommandError("{} invalid rows, nothing imported".format(len(history.errors)))
+        self.stdout.write(self.style.SUCCESS("{} cigarettes imported".format(history.nb_created)))
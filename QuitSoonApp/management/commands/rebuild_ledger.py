@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+
+"""
+Command rebuilding DailyLedger rows from raw ConsoCig and ConsoAlternative,
+used for backfill and repair
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from QuitSoonApp.modules import LedgerManager, StatsCache
+
+
+class Command(BaseCommand):
+    help = "Rebuild users daily ledger from their cigarettes and healthy actions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help="Rebuild only these users (default: all users)",
+            )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        nb_users = 0
+        for user in users.iterator():
+            nb_days = LedgerManager(user).rebuild()
+            # reports and forecast cached from the broken ledger
+            StatsCache(user).bump_version()
+            nb_users += 1
+            if options['verbosity'] > 1:
+                self.stdout.write("{}: {} days".format(user.username, nb_days))
+        self.stdout.write(self.style.SUCCESS("Ledger rebuilt for {} users".format(nb_users)))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+"""
+Command recomputing users trophies and trophies progress from raw ConsoCig
+history, used for backfill and repair
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from QuitSoonApp.modules import TropheeManager
+
+
+class Command(BaseCommand):
+    help = "Rebuild users trophies from their cigarettes history"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help="Rebuild only these users (default: all users with a profile)",
+            )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(userprofile__isnull=False)
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        nb_users = 0
+        for user in users.iterator():
+            trophees = TropheeManager(user).rebuild()
+            nb_users += 1
+            if options['verbosity'] > 1:
+                self.stdout.write("{}: {} trophies".format(user.username, len(trophees)))
+        self.stdout.write(self.style.SUCCESS("Trophies rebuilt for {} users".format(nb_users)))
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QuitSoonApp', '0020_auto_20200601_1254'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consocig',
+            index=models.Index(fields=['user', 'date_cig'], name='QuitSoonApp_user_id_df0c1c_idx'),
+        ),
+    ]
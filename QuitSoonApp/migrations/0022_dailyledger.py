@@ -0,0 +1,69 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum, Q
+import django.db.models.deletion
+
+
+def backfill_ledger(apps, schema_editor):
+    """build DailyLedger rows of all users from their ConsoCig and ConsoAlternative"""
+    ConsoCig = apps.get_model('QuitSoonApp', 'ConsoCig')
+    ConsoAlternative = apps.get_model('QuitSoonApp', 'ConsoAlternative')
+    DailyLedger = apps.get_model('QuitSoonApp', 'DailyLedger')
+    days = {}
+
+    def get_day(user_id, date):
+        if (user_id, date) not in days:
+            days[(user_id, date)] = DailyLedger(user_id=user_id, date=date)
+        return days[(user_id, date)]
+
+    smoke_days = ConsoCig.objects.values('user', 'date_cig').annotate(
+        nb_cig=Count('id'),
+        nb_given=Count('id', filter=Q(given=True)),
+        money_smoked=Sum('paquet__price_per_cig', filter=Q(given=False)),
+        ).order_by()
+    for smoke_day in smoke_days:
+        day = get_day(smoke_day['user'], smoke_day['date_cig'])
+        day.nb_cig = smoke_day['nb_cig']
+        day.nb_given = smoke_day['nb_given']
+        day.money_smoked = smoke_day['money_smoked'] or 0
+
+    health_days = ConsoAlternative.objects.values('user', 'date_alter').annotate(
+        activity_duration=Sum('activity_duration', filter=Q(alternative__type_alternative='Ac')),
+        nb_substitut=Count('id', filter=Q(alternative__type_alternative='Su')),
+        ).order_by()
+    for health_day in health_days:
+        day = get_day(health_day['user'], health_day['date_alter'])
+        day.activity_duration = health_day['activity_duration'] or 0
+        day.nb_substitut = health_day['nb_substitut']
+
+    DailyLedger.objects.bulk_create(days.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('QuitSoonApp', '0021_auto_20261018_1709'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLedger',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('nb_cig', models.IntegerField(default=0)),
+                ('nb_given', models.IntegerField(default=0)),
+                ('money_smoked', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('activity_duration', models.IntegerField(default=0)),
+                ('nb_substitut', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+def set_ref_price_per_cig(apps, schema_editor):
+    UserProfile = apps.get_model('QuitSoonApp', 'UserProfile')
+    Paquet = apps.get_model('QuitSoonApp', 'Paquet')
+    for userprofile in UserProfile.objects.all():
+        userprofile.ref_price_per_cig = Paquet.objects.filter(
+            user_id=userprofile.user_id).order_by('id').values_list(
+            'price_per_cig', flat=True).first()
+        userprofile.save(update_fields=['ref_price_per_cig'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QuitSoonApp', '0022_dailyledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='ref_price_per_cig',
+            field=models.DecimalField(decimal_places=2, max_digits=4, null=True),
+        ),
+        migrations.RunPython(set_ref_price_per_cig, migrations.RunPython.noop),
+    ]
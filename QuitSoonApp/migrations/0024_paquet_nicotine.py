@@ -0,0 +1,18 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QuitSoonApp', '0023_userprofile_ref_price_per_cig'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paquet',
+            name='nicotine',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QuitSoonApp', '0024_paquet_nicotine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objectif',
+            name='closed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
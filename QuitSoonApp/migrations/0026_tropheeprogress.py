@@ -0,0 +1,31 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('QuitSoonApp', '0025_objectif_closed'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='trophee',
+            unique_together={('user', 'nb_cig', 'nb_jour')},
+        ),
+        migrations.CreateModel(
+            name='TropheeProgress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_smoke_date', models.DateField(null=True)),
+                ('nb_cig', models.IntegerField(default=0)),
+                ('days_level', models.IntegerField(default=0)),
+                ('cig_level', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
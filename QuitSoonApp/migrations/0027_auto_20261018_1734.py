@@ -0,0 +1,17 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QuitSoonApp', '0026_tropheeprogress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consocig',
+            index=models.Index(fields=['user', 'id'], name='QuitSoonApp_user_id_5f9b2c_idx'),
+        ),
+    ]
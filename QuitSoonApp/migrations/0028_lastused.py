@@ -0,0 +1,61 @@
+# Generated by Django 3.0.5 on 2026-10-18 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('QuitSoonApp', '0027_auto_20261018_1734'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LastUsed',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='consoalternative',
+            index=models.Index(fields=['user', 'id'], name='QuitSoonApp_user_id_6f5c04_idx'),
+        ),
+        migrations.AddField(
+            model_name='lastused',
+            name='alternative',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='QuitSoonApp.Alternative'),
+        ),
+        migrations.AddField(
+            model_name='lastused',
+            name='alternative_lo',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='QuitSoonApp.Alternative'),
+        ),
+        migrations.AddField(
+            model_name='lastused',
+            name='alternative_so',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='QuitSoonApp.Alternative'),
+        ),
+        migrations.AddField(
+            model_name='lastused',
+            name='alternative_sp',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='QuitSoonApp.Alternative'),
+        ),
+        migrations.AddField(
+            model_name='lastused',
+            name='alternative_su',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='QuitSoonApp.Alternative'),
+        ),
+        migrations.AddField(
+            model_name='lastused',
+            name='paquet',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='QuitSoonApp.Paquet'),
+        ),
+        migrations.AddField(
+            model_name='lastused',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
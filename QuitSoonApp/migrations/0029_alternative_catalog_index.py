@@ -0,0 +1,53 @@
+# Generated by Django 3.0.5 on 2026-10-18 18:02
+
+from django.db import migrations
+
+
+LAST_USED_FIELDS = [
+    'alternative', 'alternative_sp', 'alternative_lo', 'alternative_so', 'alternative_su',
+]
+
+
+def merge_duplicate_alternatives(apps, schema_editor):
+    """keep first of alternatives sharing the same catalog key, before unique index"""
+    Alternative = apps.get_model('QuitSoonApp', 'Alternative')
+    ConsoAlternative = apps.get_model('QuitSoonApp', 'ConsoAlternative')
+    LastUsed = apps.get_model('QuitSoonApp', 'LastUsed')
+    kept = {}
+    for alternative in Alternative.objects.order_by('id'):
+        key = (
+            alternative.user_id, alternative.type_alternative, alternative.type_activity,
+            alternative.activity, alternative.substitut, alternative.nicotine,
+            )
+        first = kept.setdefault(key, alternative)
+        if first.id == alternative.id:
+            continue
+        ConsoAlternative.objects.filter(alternative_id=alternative.id).update(alternative_id=first.id)
+        for field in LAST_USED_FIELDS:
+            LastUsed.objects.filter(**{field + '_id': alternative.id}).update(**{field + '_id': first.id})
+        if alternative.display and not first.display:
+            first.display = True
+            first.save(update_fields=['display'])
+        alternative.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QuitSoonApp', '0028_lastused'),
+    ]
+
+    # NULL columns never conflict in unique_together, so alternatives catalog
+    # key is made unique on COALESCE expressions, target of AlternativeManager upsert
+    operations = [
+        migrations.RunPython(merge_duplicate_alternatives, migrations.RunPython.noop),
+        migrations.RunSQL(
+            """
+            CREATE UNIQUE INDEX "QuitSoonApp_alternative_catalog_uniq" ON "QuitSoonApp_alternative" (
+                "user_id", "type_alternative", COALESCE("type_activity", ''), COALESCE("activity", ''),
+                COALESCE("substitut", ''), COALESCE("nicotine", -1)
+            )
+            """,
+            'DROP INDEX "QuitSoonApp_alternative_catalog_uniq"',
+        ),
+    ]
@@ -8,6 +8,8 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     date_start = models.DateField()
     starting_nb_cig = models.IntegerField()
+    # price per cigarette of user first pack, used to evaluate money saved
+    ref_price_per_cig = models.DecimalField(max_digits=4, decimal_places=2, null=True)
 
 
 class Paquet(models.Model):
@@ -35,6 +37,8 @@ class Paquet(models.Model):
     price = models.DecimalField(max_digits=5, decimal_places=2)
     g_per_cig = models.DecimalField(max_digits=3, decimal_places=1, null=True)
     price_per_cig = models.DecimalField(max_digits=4, decimal_places=2, null=True)
+    # mg of nicotine per cigarette
+    nicotine = models.FloatField(null=True, blank=True)
     display = models.BooleanField(default=True)
 
     class Meta:
@@ -51,6 +55,13 @@ class ConsoCig(models.Model):
     paquet = models.ForeignKey(Paquet, on_delete=models.CASCADE, null=True)
     given = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date_cig']),
+            # user last smokes
+            models.Index(fields=['user', 'id']),
+        ]
+
     def __str__(self):
         if self.paquet:
             paquet = self.paquet.type_cig
@@ -127,6 +138,12 @@ class ConsoAlternative(models.Model):
         null=True,
     )
 
+    class Meta:
+        indexes = [
+            # user last healthy actions
+            models.Index(fields=['user', 'id']),
+        ]
+
 
 class Objectif(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -134,12 +151,64 @@ class Objectif(models.Model):
     datetime_creation = models.DateTimeField()
     datetime_objectif = models.DateTimeField()
     respected = models.BooleanField(default=False)
+    # True once evaluated, after datetime_objectif
+    closed = models.BooleanField(default=False)
 
 
 class Trophee(models.Model):
+    """
+    Smoking at most nb_cig cigarettes per day during nb_jour days,
+    or nb_cig cigarettes avoided since date_start if nb_jour is 0
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     nb_cig = models.IntegerField()
     nb_jour = models.IntegerField()
 
     class Meta:
-        unique_together = ('nb_cig', 'nb_jour',)
+        unique_together = ('user', 'nb_cig', 'nb_jour',)
+
+
+class TropheeProgress(models.Model):
+    """User state checked against trophies thresholds on each new or deleted cigarette"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # last day user smoked, smoke free run starts the day after
+    last_smoke_date = models.DateField(null=True)
+    # cigarettes smoked since date_start
+    nb_cig = models.IntegerField(default=0)
+    # number of thresholds already reached in each trophies ladder
+    days_level = models.IntegerField(default=0)
+    cig_level = models.IntegerField(default=0)
+
+
+class DailyLedger(models.Model):
+    """Daily summary of user consumption, updated on each new or deleted action"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    nb_cig = models.IntegerField(default=0)
+    nb_given = models.IntegerField(default=0)
+    money_smoked = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    activity_duration = models.IntegerField(default=0)
+    nb_substitut = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date')
+
+
+class LastUsed(models.Model):
+    """
+    Pack and alternatives of user last smoke and healthy actions,
+    used as default choices of SmokeForm and HealthForm
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    paquet = models.ForeignKey(Paquet, on_delete=models.SET_NULL, null=True, related_name='+')
+    alternative = models.ForeignKey(
+        Alternative, on_delete=models.SET_NULL, null=True, related_name='+')
+    # last alternative of each type_activity and last substitut
+    alternative_sp = models.ForeignKey(
+        Alternative, on_delete=models.SET_NULL, null=True, related_name='+')
+    alternative_lo = models.ForeignKey(
+        Alternative, on_delete=models.SET_NULL, null=True, related_name='+')
+    alternative_so = models.ForeignKey(
+        Alternative, on_delete=models.SET_NULL, null=True, related_name='+')
+    alternative_su = models.ForeignKey(
+        Alternative, on_delete=models.SET_NULL, null=True, related_name='+')
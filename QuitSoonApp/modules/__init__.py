@@ -1,6 +1,19 @@
 from .resetprofile import ResetProfile
+from .ledger_manager import LedgerManager
+from .last_used_manager import LastUsedManager
+from .catalog_cache import CatalogCache
 from .alternative_manager import AlternativeManager
 from .pack_manager import PackManager
+from .smoke_forecast import SmokeForecast
+from .trophee_manager import TropheeManager
 from .smoke_manager import SmokeManager
 from .health_manager import HealthManager
+from .day_calendar import DayCalendar
 from .smoke_stats import SmokeStats
+from .stats_cache import StatsCache
+from .smoke_heatmap import SmokeHeatmap
+from .nicotine_intake import NicotineIntake
+from .smoke_timeseries import SmokeTimeseries
+from .history_export import HistoryExport
+from .history_import import HistoryImport
+from .objectif_evaluation import ObjectifEvaluation
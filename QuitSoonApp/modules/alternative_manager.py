@@ -6,8 +6,12 @@ This module allowes user to save a new instance of cigarettes pack
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import OuterRef
 
 from ..models import Alternative, ConsoAlternative
+from .stats_cache import StatsCache
+from .catalog_cache import CatalogCache
+from .catalog_rows import upsert_displayed, hide_or_delete
 
 class AlternativeManager:
     """class returning an new DB object paquet or False"""
@@ -82,31 +86,43 @@ class AlternativeManager:
                 )
         return alternative
 
+    def upsert_alternative(self):
+        """
+        Insert alternative, or display it again if already saved by user, on the
+        alternatives catalog unique index (COALESCE on nullable columns, see migration 0029)
+        """
+        return upsert_displayed(
+            Alternative,
+            {
+                'user': self.user.id,
+                'type_alternative': self.type_alternative,
+                'type_activity': self.type_activity,
+                'activity': self.activity,
+                'substitut': self.substitut,
+                'nicotine': self.nicotine,
+                'display': True,
+            },
+            "{user}, {type_alternative}, COALESCE({type_activity}, ''), COALESCE({activity}, ''), "
+            "COALESCE({substitut}, ''), COALESCE({nicotine}, -1)",
+            )
+
     def create_alternative(self):
         """Create pack from datas"""
-        # unicity checked in form and in model index
-        if self.get_alternative:
-            newAlternative = self.filter_alternative
-            newAlternative.update(display=True)
-        else:
-            newAlternative = Alternative.objects.create(
-                user=self.user,
-                type_alternative=self.type_alternative,
-                type_activity=self.type_activity,
-                activity=self.activity,
-                substitut=self.substitut,
-                nicotine=self.nicotine,
-                )
+        newAlternative = self.upsert_alternative()
+        StatsCache(self.user).bump_version()
+        CatalogCache(self.user).clear()
         return newAlternative
 
     def delete_alternative(self):
-        if self.id:
-            if self.get_alternative:
-                alternative_filtered = self.filter_alternative
-                # check if already smoked by user
-                if ConsoAlternative.objects.filter(alternative=self.get_alternative):
-                    # if yes: update display to False
-                    alternative_filtered.update(display=False)
-                else:
-                    # if not: delete object
-                    alternative_filtered.delete()
+        """
+        Hide alternative if already used by user, delete it if not.
+        Return True if user alternative was found
+        """
+        if not self.id:
+            return False
+        alternative = Alternative.objects.filter(user=self.user, id=self.id)
+        if not hide_or_delete(alternative, ConsoAlternative.objects.filter(alternative=OuterRef('pk'))):
+            return False
+        StatsCache(self.user).bump_version()
+        CatalogCache(self.user).clear()
+        return True
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+"""
+This module caches user packs and alternatives across requests.
+They only change when user edits his parameters, so SmokeForm and HealthForm
+build their choices from this catalog without querying the DB, until
+PackManager or AlternativeManager clears it
+"""
+
+from django.core.cache import caches
+from django.utils.functional import cached_property
+
+from ..models import Paquet, Alternative
+
+
+class CatalogCache:
+    """Get user catalog (displayed packs, alternatives, ecig ids) from cache or DB"""
+
+    def __init__(self, user):
+        self.user = user
+        self.cache = caches['stats']
+        self.key = 'catalog:{}'.format(self.user.id)
+
+    def compute_catalog(self):
+        alternatives = list(Alternative.objects.filter(user=self.user).order_by('id'))
+        return {
+            'packs': list(Paquet.objects.filter(user=self.user, display=True).order_by('id')),
+            'alternatives': alternatives,
+            'ecig_ids': {
+                alternative.id for alternative in alternatives
+                if alternative.type_alternative == 'Su' and (alternative.substitut or '').upper() == 'ECIG'
+                },
+            }
+
+    @cached_property
+    def catalog(self):
+        """user catalog, read once per CatalogCache instance"""
+        catalog = self.cache.get(self.key)
+        if catalog is None:
+            catalog = self.compute_catalog()
+            self.cache.set(self.key, catalog)
+        return catalog
+
+    @property
+    def packs(self):
+        """user displayed packs, ordered by creation"""
+        return self.catalog['packs']
+
+    @property
+    def alternatives(self):
+        """all user alternatives (displayed or not), ordered by creation"""
+        return self.catalog['alternatives']
+
+    @property
+    def displayed_alternatives(self):
+        return [alternative for alternative in self.alternatives if alternative.display]
+
+    @property
+    def ecig_ids(self):
+        return self.catalog['ecig_ids']
+
+    def clear(self):
+        """invalidate user catalog after a pack or alternative change"""
+        self.cache.delete(self.key)
+        self.__dict__.pop('catalog', None)
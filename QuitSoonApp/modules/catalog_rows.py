@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+"""
+This module saves and removes rows of user catalog (packs, alternatives)
+without racing concurrent requests: one INSERT ... ON CONFLICT to create or
+display a row again, a locked soft delete to hide a used row or delete it
+"""
+
+from django.db import connection, transaction
+from django.db.models import Exists
+
+
+def upsert_displayed(model, values, conflict):
+    """
+    Insert model row from values {field name: value}, or display it again if
+    already saved, in one INSERT ... ON CONFLICT statement. conflict is the
+    target of the unique index, formatted with quoted columns by field name
+    """
+    fields = [model._meta.get_field(name) for name in values]
+    quote = connection.ops.quote_name
+    columns = {field.name: quote(field.column) for field in model._meta.concrete_fields}
+    sql = """
+        INSERT INTO {table} ({columns}) VALUES ({placeholders})
+        ON CONFLICT ({conflict}) DO UPDATE SET {display} = %s
+        RETURNING *
+        """.format(
+            table=quote(model._meta.db_table),
+            columns=', '.join(quote(field.column) for field in fields),
+            placeholders=', '.join(['%s'] * len(fields)),
+            conflict=conflict.format(**columns),
+            display=columns['display'],
+            )
+    params = [field.get_db_prep_save(values[field.name], connection) for field in fields]
+    params.append(True)
+    return list(model.objects.raw(sql, params))[0]
+
+
+def hide_or_delete(queryset, used):
+    """
+    Hide row of queryset if used (Exists subquery on its pk), delete it if not.
+    Row is locked first, so a concurrent use waits for the soft delete.
+    Return True if row was found
+    """
+    with transaction.atomic():
+        if not queryset.select_for_update().exists():
+            return False
+        if not queryset.filter(Exists(used)).update(display=False):
+            # deleted through the ORM for cascades and SET_NULL
+            queryset.delete()
+    return True
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+"""
+This module maps each day of a period on a bytearray indexed by day offset,
+allowing O(1) checks of smoking days without querying the DB for each day
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+
+class DayCalendar:
+    """Calendar of smoking days between date_start and lastday (both included)"""
+
+    def __init__(self, date_start, lastday, smoking_days=()):
+        self.date_start = date_start
+        self.lastday = lastday
+        self.nb_days = max((lastday - date_start).days + 1, 0)
+        # one byte per day, 1 if user smoked this day
+        self.bitmap = bytearray(self.nb_days)
+        for day in smoking_days:
+            self.mark(day)
+
+    @classmethod
+    def from_conso(cls, user_conso, date_start, lastday):
+        """Build calendar from distinct dates of a ConsoCig queryset in one query"""
+        smoking_days = user_conso.filter(
+            date_cig__range=(date_start, lastday)
+            ).order_by().values_list('date_cig', flat=True).distinct()
+        return cls(date_start, lastday, smoking_days)
+
+    def offset(self, day):
+        """get day index in bitmap or None if day is out of calendar"""
+        offset = (day - self.date_start).days
+        if 0 <= offset < self.nb_days:
+            return offset
+        return None
+
+    def day(self, offset):
+        return self.date_start + timedelta(days=offset)
+
+    def mark(self, day):
+        offset = self.offset(day)
+        if offset is not None:
+            self.bitmap[offset] = 1
+
+    def is_smoking_day(self, day):
+        offset = self.offset(day)
+        if offset is None:
+            return False
+        return bool(self.bitmap[offset])
+
+    def __contains__(self, day):
+        return self.is_smoking_day(day)
+
+    def __len__(self):
+        return self.nb_days
+
+    @property
+    def count_smoking_day(self):
+        return self.bitmap.count(1)
+
+    @property
+    def count_no_smoking_day(self):
+        return self.nb_days - self.count_smoking_day
+
+    @property
+    def no_smoking_day(self):
+        return [self.day(offset) for offset, smoked in enumerate(self.bitmap) if not smoked]
+
+    def smoke_free_runs(self):
+        """
+        Run-length encode no smoking days of bitmap in one vectorized pass
+        return (starts, ends) arrays of offsets, ends excluded
+        """
+        smoke_free = np.frombuffer(bytes(self.bitmap), dtype=np.uint8) == 0
+        edges = np.diff(np.concatenate(([0], smoke_free.view(np.int8), [0])))
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    @property
+    def streaks(self):
+        """list of smoke free streaks as (first day, last day, nb days)"""
+        starts, ends = self.smoke_free_runs()
+        return [
+            (self.day(int(start)), self.day(int(end) - 1), int(end - start))
+            for start, end in zip(starts, ends)
+            ]
+
+    @property
+    def longest_streak(self):
+        starts, ends = self.smoke_free_runs()
+        if not starts.size:
+            return 0
+        return int((ends - starts).max())
+
+    @property
+    def current_streak(self):
+        """nb smoke free days until lastday included"""
+        starts, ends = self.smoke_free_runs()
+        if not starts.size or ends[-1] != self.nb_days:
+            return 0
+        return int(ends[-1] - starts[-1])
@@ -2,21 +2,28 @@
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.db.utils import IntegrityError
 
 from QuitSoonApp.models import Alternative, ConsoAlternative
+from .ledger_manager import LedgerManager
+from .last_used_manager import LastUsedManager
+from .stats_cache import StatsCache
 
 
 class HealthManager:
     """Manage informations of healthy actions"""
 
-    def __init__(self, user, datas):
+    def __init__(self, user, datas, alternative=None):
         self.datas = datas
         self.user = user
         self.id = self.get_request_data('id_health')
         if not self.id:
             self.date_alter = self.get_request_data('date_health')
             self.time_alter = self.get_request_data('time_health')
+        # memoized lookups, alternative may be already loaded by caller (from HealthForm catalog)
+        self._conso_alternative = None
+        self._alternative = alternative
 
 
     def get_request_data(self, data):
@@ -27,9 +34,14 @@ class HealthManager:
 
     @property
     def get_conso_alternative(self):
+        if self._conso_alternative is None:
+            self._conso_alternative = self.find_conso_alternative()
+        return self._conso_alternative
+
+    def find_conso_alternative(self):
         try:
             if self.id:
-                health = ConsoAlternative.objects.get(id=self.id)
+                health = ConsoAlternative.objects.select_related('alternative').get(id=self.id)
             else:
                 health = ConsoAlternative.objects.get(
                     user=self.user,
@@ -45,6 +57,11 @@ class HealthManager:
 
     @property
     def get_alternative(self):
+        if self._alternative is None:
+            self._alternative = self.find_alternative()
+        return self._alternative
+
+    def find_alternative(self):
         try:
             if self.id:
             # when user wants to delete a heath action, ConsoAlternative id is returned in request
@@ -79,15 +96,20 @@ class HealthManager:
     def create_conso_alternative(self):
         """Create ConsoAlternative from datas"""
         try:
-            newconsoalternative = ConsoAlternative.objects.create(
-                user=self.user,
-                date_alter=self.date_alter,
-                time_alter=self.time_alter,
-                alternative=self.get_alternative,
-                activity_duration=self.get_duration,
-                ecig_choice=self.get_ecig_data,
-                )
+            with transaction.atomic():
+                newconsoalternative = ConsoAlternative.objects.create(
+                    user=self.user,
+                    date_alter=self.date_alter,
+                    time_alter=self.time_alter,
+                    alternative=self.get_alternative,
+                    activity_duration=self.get_duration,
+                    ecig_choice=self.get_ecig_data,
+                    )
+                LedgerManager(self.user).add_conso_alternative(newconsoalternative)
+                LastUsedManager(self.user).add_conso_alternative(newconsoalternative)
+            StatsCache(self.user).bump_version()
             self.id = newconsoalternative.id
+            self._conso_alternative = newconsoalternative
             return newconsoalternative
         except (IntegrityError, AttributeError):
             return None
@@ -95,6 +117,17 @@ class HealthManager:
     def delete_conso_alternative(self):
         try:
             if self.id:
-                self.get_conso_alternative.delete()
+                conso = self.get_conso_alternative
+                with transaction.atomic():
+                    conso.delete()
+                    LedgerManager(self.user).remove_conso_alternative(conso)
+                    LastUsedManager(self.user).remove_conso_alternative(conso)
+                StatsCache(self.user).bump_version()
+                self.clear_lookups()
         except AttributeError:
             pass
+
+    def clear_lookups(self):
+        """forget memoized conso and alternative, once deleted"""
+        self._conso_alternative = None
+        self._alternative = None
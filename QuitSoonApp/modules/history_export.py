@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+"""
+This module exports user whole history of cigarettes and healthy actions,
+line by line, so that it can be streamed without loading it in memory
+"""
+
+import csv
+import json
+from itertools import chain
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from QuitSoonApp.models import ConsoCig, ConsoAlternative
+
+
+class Echo:
+    """Pseudo-buffer giving back what csv.writer writes in it"""
+
+    def write(self, value):
+        return value
+
+
+class HistoryExport:
+    """Generate user history as csv or ndjson lines"""
+
+    FORMATS = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    FIELDS = [
+        'action', 'date', 'time',
+        # smoke fields
+        'given', 'type_cig', 'brand', 'qt_paquet', 'unit', 'price_per_cig',
+        # health fields
+        'type_alternative', 'type_activity', 'activity', 'substitut', 'nicotine',
+        'activity_duration', 'ecig_choice',
+    ]
+
+    def __init__(self, user, date_start=None, lastday=None, chunk_size=2000):
+        self.user = user
+        self.date_start = date_start
+        self.lastday = lastday
+        self.chunk_size = chunk_size
+
+    def filter_dates(self, queryset, date_field):
+        if self.date_start:
+            queryset = queryset.filter(**{date_field + '__gte': self.date_start})
+        if self.lastday:
+            queryset = queryset.filter(**{date_field + '__lte': self.lastday})
+        return queryset
+
+    def smoke_rows(self):
+        smoke = ConsoCig.objects.filter(user=self.user).select_related('paquet')
+        smoke = self.filter_dates(smoke, 'date_cig').order_by('date_cig', 'time_cig')
+        for conso in smoke.iterator(chunk_size=self.chunk_size):
+            row = {
+                'action': 'smoke',
+                'date': conso.date_cig,
+                'time': conso.time_cig,
+                'given': conso.given,
+                }
+            if conso.paquet:
+                row.update({
+                    'type_cig': conso.paquet.type_cig,
+                    'brand': conso.paquet.brand,
+                    'qt_paquet': conso.paquet.qt_paquet,
+                    'unit': conso.paquet.unit,
+                    'price_per_cig': conso.paquet.price_per_cig,
+                    })
+            yield row
+
+    def health_rows(self):
+        health = ConsoAlternative.objects.filter(user=self.user).select_related('alternative')
+        health = self.filter_dates(health, 'date_alter').order_by('date_alter', 'time_alter')
+        for conso in health.iterator(chunk_size=self.chunk_size):
+            yield {
+                'action': 'health',
+                'date': conso.date_alter,
+                'time': conso.time_alter,
+                'type_alternative': conso.alternative.type_alternative,
+                'type_activity': conso.alternative.type_activity,
+                'activity': conso.alternative.activity,
+                'substitut': conso.alternative.substitut,
+                'nicotine': conso.alternative.nicotine,
+                'activity_duration': conso.activity_duration,
+                'ecig_choice': conso.ecig_choice,
+                }
+
+    def rows(self):
+        return chain(self.smoke_rows(), self.health_rows())
+
+    def csv_lines(self):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.FIELDS)
+        for row in self.rows():
+            yield writer.writerow([row.get(field) for field in self.FIELDS])
+
+    def ndjson_lines(self):
+        for row in self.rows():
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+    def lines(self, export_format):
+        if export_format == 'ndjson':
+            return self.ndjson_lines()
+        return self.csv_lines()
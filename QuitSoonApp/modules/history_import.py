@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+"""
+This module imports a user cigarettes history from csv lines: date,time,pack
+    date: YYYY-MM-DD or DD/MM/YYYY
+    time: HH:MM
+    pack: brand of one of user packs, empty for a given cigarette
+          (a brand shared by several displayed packs is ambiguous and rejected)
+"""
+
+import csv
+from datetime import datetime
+
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_time
+
+from QuitSoonApp.models import Paquet, ConsoCig
+from .ledger_manager import LedgerManager
+from .last_used_manager import LastUsedManager
+from .trophee_manager import TropheeManager
+from .stats_cache import StatsCache
+
+
+class HistoryImport:
+    """Check csv rows and save them all at once as ConsoCig if none is invalid"""
+
+    def __init__(self, user, lines, batch_size=1000):
+        self.user = user
+        self.lines = lines
+        self.batch_size = batch_size
+        self.errors = []
+        self.nb_created = 0
+
+    def get_packs(self):
+        """
+        get user packs matching each brand in one query: displayed packs of the
+        brand, or its hidden packs if none is displayed
+        """
+        packs = {}
+        for pack in Paquet.objects.filter(user=self.user).order_by('id'):
+            displayed, hidden = packs.setdefault(pack.brand.upper(), ([], []))
+            (displayed if pack.display else hidden).append(pack)
+        return {brand: displayed or hidden for brand, (displayed, hidden) in packs.items()}
+
+    @staticmethod
+    def get_date(value):
+        value = value.strip()
+        try:
+            date = parse_date(value)
+            if date is None:
+                date = datetime.strptime(value, '%d/%m/%Y').date()
+            return date
+        except ValueError:
+            raise ValueError("Date invalide : '{}'".format(value))
+
+    @staticmethod
+    def get_time(value):
+        value = value.strip()
+        try:
+            time = parse_time(value)
+        except ValueError:
+            time = None
+        if time is None:
+            raise ValueError("Heure invalide : '{}'".format(value))
+        return time
+
+    def get_conso(self, row, packs):
+        if len(row) < 2:
+            raise ValueError("Ligne incomplète, format attendu : date,heure,paquet")
+        brand = row[2].strip().upper() if len(row) > 2 else ''
+        if brand and brand not in packs:
+            raise ValueError("Paquet inconnu : '{}'".format(row[2].strip()))
+        if len(packs.get(brand, [])) > 1:
+            raise ValueError("Paquet ambigu : plusieurs paquets '{}'".format(row[2].strip()))
+        return ConsoCig(
+            user=self.user,
+            date_cig=self.get_date(row[0]),
+            time_cig=self.get_time(row[1]),
+            paquet=packs[brand][0] if brand else None,
+            given=not brand,
+            )
+
+    def run(self):
+        """import history, return number of created ConsoCig"""
+        packs = self.get_packs()
+        consos = []
+        line_number = 0
+        try:
+            for line_number, row in enumerate(csv.reader(self.lines), 1):
+                if not any(cell.strip() for cell in row):
+                    continue
+                if line_number == 1 and row[0].strip().lower() == 'date':
+                    # header
+                    continue
+                try:
+                    consos.append(self.get_conso(row, packs))
+                except ValueError as error:
+                    self.errors.append((line_number, str(error)))
+        except (csv.Error, UnicodeDecodeError) as error:
+            # next lines can't be read
+            self.errors.append((line_number + 1, "Fichier illisible : {}".format(error)))
+        if self.errors or not consos:
+            return 0
+        with transaction.atomic():
+            ConsoCig.objects.bulk_create(consos, batch_size=self.batch_size)
+            LedgerManager(self.user).rebuild()
+            LastUsedManager(self.user).rebuild()
+            TropheeManager(self.user).rebuild()
+        StatsCache(self.user).bump_version()
+        self.nb_created = len(consos)
+        return self.nb_created
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""
+This module keeps user LastUsed pointers up to date: pack of last smoke and
+alternatives of last healthy actions, updated on each new conso and repaired
+with one indexed lookup when a conso is deleted
+"""
+
+from django.utils.functional import cached_property
+
+from ..models import ConsoCig, ConsoAlternative, LastUsed
+
+
+class LastUsedManager:
+    """Manage user LastUsed row"""
+
+    # LastUsed field of last alternative for each type_activity
+    ACTIVITY_FIELDS = {
+        'Sp': 'alternative_sp',
+        'Lo': 'alternative_lo',
+        'So': 'alternative_so',
+    }
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def last_used(self):
+        """user LastUsed with its packs and alternatives, built from history if missing"""
+        last_used = LastUsed.objects.select_related(
+            'paquet', 'alternative',
+            'alternative_sp', 'alternative_lo', 'alternative_so', 'alternative_su',
+            ).filter(user=self.user).first()
+        if last_used is None:
+            last_used = self.rebuild()
+        return last_used
+
+    @classmethod
+    def alternative_field(cls, alternative):
+        if alternative.type_alternative == 'Su':
+            return 'alternative_su'
+        return cls.ACTIVITY_FIELDS.get(alternative.type_activity)
+
+    def last_paquet_id(self):
+        return ConsoCig.objects.filter(
+            user=self.user, paquet__isnull=False,
+            ).order_by('-id').values_list('paquet', flat=True).first()
+
+    def last_alternative_id(self, **filters):
+        return ConsoAlternative.objects.filter(
+            user=self.user, **filters,
+            ).order_by('-id').values_list('alternative', flat=True).first()
+
+    def update(self, **pointers):
+        """update pointers of user LastUsed, rebuilding it if missing"""
+        if not LastUsed.objects.filter(user=self.user).update(**pointers):
+            self.rebuild()
+
+    def add_conso_cig(self, conso):
+        if conso.paquet_id:
+            self.update(paquet_id=conso.paquet_id)
+
+    def remove_conso_cig(self, conso):
+        if conso.paquet_id:
+            self.update(paquet_id=self.last_paquet_id())
+
+    def add_conso_alternative(self, conso):
+        pointers = {'alternative_id': conso.alternative_id}
+        field = self.alternative_field(conso.alternative)
+        if field:
+            pointers[field + '_id'] = conso.alternative_id
+        self.update(**pointers)
+
+    def remove_conso_alternative(self, conso):
+        pointers = {'alternative_id': self.last_alternative_id()}
+        field = self.alternative_field(conso.alternative)
+        if field == 'alternative_su':
+            pointers[field + '_id'] = self.last_alternative_id(alternative__type_alternative='Su')
+        elif field:
+            pointers[field + '_id'] = self.last_alternative_id(
+                alternative__type_activity=conso.alternative.type_activity)
+        self.update(**pointers)
+
+    def rebuild(self):
+        """Recompute all user pointers from ConsoCig and ConsoAlternative"""
+        pointers = {
+            'paquet_id': self.last_paquet_id(),
+            'alternative_id': self.last_alternative_id(),
+            'alternative_su_id': self.last_alternative_id(alternative__type_alternative='Su'),
+            }
+        for type_activity, field in self.ACTIVITY_FIELDS.items():
+            pointers[field + '_id'] = self.last_alternative_id(
+                alternative__type_activity=type_activity)
+        last_used, created = LastUsed.objects.update_or_create(user=self.user, defaults=pointers)
+        return last_used
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+"""
+This module keeps DailyLedger up to date with user consumption:
+one summary row per user and per day, incremented or decremented on each
+new or deleted ConsoCig / ConsoAlternative, and rebuildable from raw history
+"""
+
+from django.db import transaction
+from django.db.models import Count, Sum, Q, F
+
+from ..models import ConsoCig, ConsoAlternative, DailyLedger
+
+
+class LedgerManager:
+    """Manage user DailyLedger rows"""
+
+    def __init__(self, user):
+        self.user = user
+
+    def update_day(self, date, **deltas):
+        """Add deltas to fields of user ledger row for date, creating row if needed"""
+        with transaction.atomic():
+            DailyLedger.objects.get_or_create(user=self.user, date=date)
+            DailyLedger.objects.filter(user=self.user, date=date).update(
+                **{field: F(field) + delta for field, delta in deltas.items()}
+                )
+
+    @staticmethod
+    def conso_cig_deltas(conso, sign=1):
+        deltas = {'nb_cig': sign}
+        if conso.given:
+            deltas['nb_given'] = sign
+        elif conso.paquet and conso.paquet.price_per_cig:
+            deltas['money_smoked'] = sign * conso.paquet.price_per_cig
+        return deltas
+
+    @staticmethod
+    def conso_alternative_deltas(conso, sign=1):
+        if conso.alternative.type_alternative == 'Su':
+            return {'nb_substitut': sign}
+        return {'activity_duration': sign * (conso.activity_duration or 0)}
+
+    def add_conso_cig(self, conso):
+        self.update_day(conso.date_cig, **self.conso_cig_deltas(conso))
+
+    def remove_conso_cig(self, conso):
+        self.update_day(conso.date_cig, **self.conso_cig_deltas(conso, -1))
+
+    def add_conso_cigs(self, consos):
+        """add many new ConsoCig, with one update per day"""
+        days = {}
+        for conso in consos:
+            deltas = days.setdefault(conso.date_cig, {})
+            for field, delta in self.conso_cig_deltas(conso).items():
+                deltas[field] = deltas.get(field, 0) + delta
+        for date, deltas in sorted(days.items()):
+            self.update_day(date, **deltas)
+
+    def add_conso_alternative(self, conso):
+        self.update_day(conso.date_alter, **self.conso_alternative_deltas(conso))
+
+    def remove_conso_alternative(self, conso):
+        self.update_day(conso.date_alter, **self.conso_alternative_deltas(conso, -1))
+
+    def rebuild(self):
+        """Recompute all user ledger rows from ConsoCig and ConsoAlternative"""
+        days = {}
+
+        def get_day(date):
+            if date not in days:
+                days[date] = DailyLedger(user=self.user, date=date)
+            return days[date]
+
+        smoke_days = ConsoCig.objects.filter(user=self.user).values('date_cig').annotate(
+            nb_cig=Count('id'),
+            nb_given=Count('id', filter=Q(given=True)),
+            money_smoked=Sum('paquet__price_per_cig', filter=Q(given=False)),
+            ).order_by('date_cig')
+        for smoke_day in smoke_days:
+            day = get_day(smoke_day['date_cig'])
+            day.nb_cig = smoke_day['nb_cig']
+            day.nb_given = smoke_day['nb_given']
+            day.money_smoked = smoke_day['money_smoked'] or 0
+
+        health_days = ConsoAlternative.objects.filter(user=self.user).values('date_alter').annotate(
+            activity_duration=Sum('activity_duration', filter=Q(alternative__type_alternative='Ac')),
+            nb_substitut=Count('id', filter=Q(alternative__type_alternative='Su')),
+            ).order_by('date_alter')
+        for health_day in health_days:
+            day = get_day(health_day['date_alter'])
+            day.activity_duration = health_day['activity_duration'] or 0
+            day.nb_substitut = health_day['nb_substitut']
+
+        with transaction.atomic():
+            DailyLedger.objects.filter(user=self.user).delete()
+            DailyLedger.objects.bulk_create(days.values())
+        return len(days)
+
+    def totals(self, date_start=None, lastday=None):
+        """Sum user ledger rows between two dates"""
+        ledger = DailyLedger.objects.filter(user=self.user)
+        if date_start:
+            ledger = ledger.filter(date__gte=date_start)
+        if lastday:
+            ledger = ledger.filter(date__lte=lastday)
+        return ledger.aggregate(
+            nb_cig=Sum('nb_cig'),
+            nb_given=Sum('nb_given'),
+            money_smoked=Sum('money_smoked'),
+            activity_duration=Sum('activity_duration'),
+            nb_substitut=Sum('nb_substitut'),
+            )
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+"""
+This module estimates mg of nicotine taken by user each day, from cigarettes
+and from nicotine substitutes, as numpy arrays covering the whole period
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from QuitSoonApp.models import ConsoCig, ConsoAlternative
+
+
+class NicotineIntake:
+    """Daily nicotine intake (mg) between date_start and lastday (both included)"""
+
+    # mg per cigarette when pack nicotine is unknown (given cigarettes...)
+    NICOTINE_PER_CIG = 1.0
+    # patches nicotine is released over their active window (hours)
+    PATCH_HOURS = {'P24': 24, 'P16': 16}
+    # e-cig nicotine is given in mg/ml, for bottles of FLACON_ML ml
+    FLACON_ML = 10
+
+    def __init__(self, user, date_start, lastday):
+        self.user = user
+        self.date_start = date_start
+        self.lastday = lastday
+        self.nb_days = max((lastday - date_start).days + 1, 0)
+
+    def offsets(self, dates):
+        return np.array([(day - self.date_start).days for day in dates], dtype=np.int64)
+
+    def add_to_days(self, per_day, offsets, mg):
+        """add mg to per_day array at offsets, ignoring days out of period"""
+        in_period = (offsets >= 0) & (offsets < self.nb_days)
+        np.add.at(per_day, offsets[in_period], mg[in_period])
+
+    @cached_property
+    def smoke(self):
+        """mg of nicotine from cigarettes per day, from one ConsoCig fetch"""
+        rows = ConsoCig.objects.filter(
+            user=self.user,
+            date_cig__range=(self.date_start, self.lastday),
+            ).values_list('date_cig', 'paquet__nicotine')
+        per_day = np.zeros(self.nb_days)
+        if rows:
+            dates, nicotine = zip(*rows)
+            mg = np.array(nicotine, dtype=float)
+            mg[np.isnan(mg)] = self.NICOTINE_PER_CIG
+            self.add_to_days(per_day, self.offsets(dates), mg)
+        return per_day
+
+    @cached_property
+    def substituts(self):
+        """mg of nicotine from substitutes per day, from one ConsoAlternative fetch"""
+        rows = ConsoAlternative.objects.filter(
+            # patches started the day before can release nicotine on first day
+            # and last e-cig bottle started before period is still used
+            Q(date_alter__gte=self.date_start - timedelta(days=1)) | Q(ecig_choice__in=['S', 'VS']),
+            user=self.user,
+            alternative__type_alternative='Su',
+            date_alter__lte=self.lastday,
+            ).values_list(
+                'date_alter', 'time_alter', 'alternative__substitut',
+                'alternative__nicotine', 'ecig_choice',
+            ).order_by('date_alter', 'time_alter')
+        per_day = np.zeros(self.nb_days)
+        if not rows:
+            return per_day
+        dates, times, substituts, nicotine, ecig_choices = zip(*rows)
+        offsets = self.offsets(dates)
+        substituts = np.array(substituts)
+        mg = np.nan_to_num(np.array(nicotine, dtype=float))
+        hours = np.array([time.hour + time.minute / 60 for time in times])
+
+        # patches, spread over their active window, maybe until next day
+        for substitut, window in self.PATCH_HOURS.items():
+            patch = substituts == substitut
+            first_day = mg[patch] * np.minimum(window, 24 - hours[patch]) / window
+            self.add_to_days(per_day, offsets[patch], first_day)
+            self.add_to_days(per_day, offsets[patch] + 1, mg[patch] - first_day)
+
+        # e-cig bottles, spread from each bottle start to the next one
+        flacon = (substituts == 'ECIG') & np.array([choice in ('S', 'VS') for choice in ecig_choices])
+        per_day += self.ecig_per_day(offsets[flacon], mg[flacon] * self.FLACON_ML)
+
+        # other substitutes taken at once, only in period
+        other = ~np.isin(substituts, list(self.PATCH_HOURS) + ['ECIG'])
+        self.add_to_days(per_day, offsets[other], mg[other])
+        return per_day
+
+    def ecig_per_day(self, starts, mg):
+        """
+        Spread each bottle evenly until next bottle start, current bottle lasting
+        as long as previous ones on average (or until lastday if first one)
+        """
+        per_day = np.zeros(self.nb_days + 1)
+        if not starts.size:
+            return per_day[:-1]
+        ends = np.append(starts[1:], 0)
+        durations = ends[:-1] - starts[:-1]
+        if durations.size and durations.sum():
+            ends[-1] = starts[-1] + max(int(round(durations[durations > 0].mean())), 1)
+        else:
+            ends[-1] = max(self.nb_days, starts[-1] + 1)
+        used = ends > starts
+        starts, ends, rate = starts[used], ends[used], mg[used] / (ends - starts)[used]
+        # difference array: each bottle adds its rate from start until end (excluded)
+        np.add.at(per_day, np.clip(starts, 0, self.nb_days), rate)
+        np.add.at(per_day, np.clip(ends, 0, self.nb_days), -rate)
+        return np.cumsum(per_day)[:-1]
+
+    @property
+    def per_day(self):
+        """total mg of nicotine per day of period"""
+        return self.smoke + self.substituts
+
+    @property
+    def days(self):
+        return [self.date_start + timedelta(days=offset) for offset in range(self.nb_days)]
+
+    @property
+    def average_per_day(self):
+        if not self.nb_days:
+            return 0
+        return float(self.per_day.mean())
+
+    @property
+    def rows(self):
+        """[(date, mg from cigarettes, mg from substitutes)] for templates"""
+        return list(zip(self.days, self.smoke.tolist(), self.substituts.tolist()))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+"""
+This module evaluates objectives of all users once their deadline is passed:
+an objective is respected if user smoked at most qt cigarettes between
+datetime_creation and datetime_objectif
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Case, When, Value, BooleanField
+from django.db.models.functions import TruncDate, TruncTime
+from django.utils import timezone
+
+from ..models import ConsoCig, Objectif
+
+
+class ObjectifEvaluation:
+    """Evaluate all open objectives ended before now in a few grouped queries"""
+
+    def __init__(self, now=None):
+        self.now = now or timezone.now()
+
+    @property
+    def due_objectifs(self):
+        return Objectif.objects.filter(closed=False, datetime_objectif__lte=self.now)
+
+    def count_smoke(self):
+        """
+        {objectif id: nb ConsoCig of user during objectif window}, counted in one
+        grouped query joining ConsoCig to the objectives of their user
+        """
+        smoke = ConsoCig.objects.annotate(
+            objectif=F('user__objectif__id'),
+            objectif_closed=F('user__objectif__closed'),
+            objectif_end=F('user__objectif__datetime_objectif'),
+            # ConsoCig date and time are local ones, compare them to local objectif window
+            start_date=TruncDate('user__objectif__datetime_creation'),
+            start_time=TruncTime('user__objectif__datetime_creation'),
+            end_date=TruncDate('user__objectif__datetime_objectif'),
+            end_time=TruncTime('user__objectif__datetime_objectif'),
+            ).filter(
+                Q(date_cig__gt=F('start_date')) | Q(date_cig=F('start_date'), time_cig__gte=F('start_time')),
+                Q(date_cig__lt=F('end_date')) | Q(date_cig=F('end_date'), time_cig__lte=F('end_time')),
+                objectif_closed=False,
+                objectif_end__lte=self.now,
+            ).values('objectif').annotate(nb_cig=Count('id')).order_by()
+        return {row['objectif']: row['nb_cig'] for row in smoke}
+
+    def evaluate(self):
+        """close due objectives and set respected in one UPDATE, return nb evaluated"""
+        with transaction.atomic():
+            objectifs = dict(self.due_objectifs.select_for_update().values_list('id', 'qt'))
+            if not objectifs:
+                return 0
+            nb_cig = self.count_smoke()
+            respected = [
+                objectif for objectif, qt in objectifs.items() if nb_cig.get(objectif, 0) <= qt
+                ]
+            return Objectif.objects.filter(id__in=objectifs).update(
+                closed=True,
+                respected=Case(
+                    When(id__in=respected, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                    ),
+                )
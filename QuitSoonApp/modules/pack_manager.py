@@ -7,8 +7,14 @@ from decimal import Decimal
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import OuterRef
 
-from ..models import Paquet, ConsoCig
+from ..models import UserProfile, Paquet, ConsoCig
+from .ledger_manager import LedgerManager
+from .stats_cache import StatsCache
+from .catalog_cache import CatalogCache
+from .catalog_rows import upsert_displayed, hide_or_delete
 
 class PackManager:
     """Manage informations of user packs"""
@@ -26,6 +32,7 @@ class PackManager:
             g_per_cig = self.get_request_data('g_per_cig')
             self.g_per_cig = self.get_g_per_cig(g_per_cig)
             self.price_per_cig = self.get_price_per_cig
+            self.nicotine = self.get_request_data('nicotine')
 
     def get_request_data(self, data):
         try:
@@ -89,35 +96,51 @@ class PackManager:
                 )
         return pack
 
+    def upsert_pack(self):
+        """Insert pack, or display it again if already saved by user, on Paquet unique columns"""
+        return upsert_displayed(
+            Paquet,
+            {
+                'user': self.user.id,
+                'type_cig': self.type_cig,
+                'brand': self.brand,
+                'qt_paquet': self.qt_paquet,
+                'unit': self.unit,
+                'price': self.price,
+                'g_per_cig': self.g_per_cig,
+                'price_per_cig': self.price_per_cig,
+                'nicotine': self.nicotine,
+                'display': True,
+            },
+            ', '.join('{%s}' % name for name in Paquet._meta.unique_together[0]),
+            )
+
     def create_pack(self):
         """Create pack from datas"""
-        if self.get_pack:
-            newpack = self.filter_pack
-            newpack.update(display=True)
-        else:
-            newpack = Paquet.objects.create(
-                user=self.user,
-                type_cig=self.type_cig,
-                brand=self.brand,
-                qt_paquet=self.qt_paquet,
-                unit=self.unit,
-                price=self.price,
-                g_per_cig=self.g_per_cig,
-                price_per_cig=self.price_per_cig
-                )
+        with transaction.atomic():
+            newpack = self.upsert_pack()
+            # a new pack only becomes reference pack if user had none before
+            UserProfile.objects.filter(
+                user=self.user, ref_price_per_cig__isnull=True,
+                ).update(ref_price_per_cig=newpack.price_per_cig)
+        StatsCache(self.user).bump_version()
+        CatalogCache(self.user).clear()
         return newpack
 
     def delete_pack(self):
-        if self.id:
-            if self.get_pack:
-                pack_filtered = self.filter_pack
-                # check if already smoked by user
-                if ConsoCig.objects.filter(paquet=self.get_pack):
-                    # if yes: update display to False
-                    pack_filtered.update(display=False)
-                else:
-                    # if not: delete object
-                    pack_filtered.delete()
+        """
+        Hide pack if already smoked by user, delete it if not.
+        Return True if user pack was found
+        """
+        if not self.id:
+            return False
+        pack = Paquet.objects.filter(user=self.user, id=self.id)
+        if not hide_or_delete(pack, ConsoCig.objects.filter(paquet=OuterRef('pk'))):
+            return False
+        self.update_ref_price_per_cig(self.user)
+        StatsCache(self.user).bump_version()
+        CatalogCache(self.user).clear()
+        return True
 
     def update_pack_g_per_cig(self):
         try :
@@ -126,5 +149,25 @@ class PackManager:
                 g_per_cig=self.g_per_cig,
                 price_per_cig=self.get_price_per_cig
                 )
+            # money smoked per day depends on pack price per cigarette
+            LedgerManager(self.user).rebuild()
+            self.update_ref_price_per_cig(self.user)
+            StatsCache(self.user).bump_version()
+            CatalogCache(self.user).clear()
         except ObjectDoesNotExist:
             pass
+
+    @staticmethod
+    def get_ref_price_per_cig(user):
+        """price per cigarette of user first created pack"""
+        return Paquet.objects.filter(user=user).order_by('id').values_list(
+            'price_per_cig', flat=True).first()
+
+    @classmethod
+    def update_ref_price_per_cig(cls, user):
+        """save user reference price in UserProfile if changed"""
+        ref_price_per_cig = cls.get_ref_price_per_cig(user)
+        updated = UserProfile.objects.filter(user=user).exclude(
+            ref_price_per_cig=ref_price_per_cig).update(ref_price_per_cig=ref_price_per_cig)
+        if updated:
+            StatsCache(user).bump_version()
@@ -9,8 +9,11 @@ from ..models import (
     UserProfile,
     ConsoCig,
     ConsoAlternative,
-    Objectif, Trophee
+    Objectif, Trophee, TropheeProgress,
+    DailyLedger, LastUsed,
 )
+from .pack_manager import PackManager
+from .stats_cache import StatsCache
 
 class ResetProfile:
 
@@ -26,11 +29,17 @@ class ResetProfile:
         ConsoAlternative.objects.filter(user=self.user).delete()
         Objectif.objects.filter(user=self.user).delete()
         Trophee.objects.filter(user=self.user).delete()
+        TropheeProgress.objects.filter(user=self.user).delete()
+        DailyLedger.objects.filter(user=self.user).delete()
+        LastUsed.objects.filter(user=self.user).delete()
+        StatsCache(self.user).bump_version()
 
     def new_profile(self):
         userprofile = UserProfile.objects.create(
             user=self.user,
             date_start=self.date_start,
-            starting_nb_cig=self.starting_nb_cig
+            starting_nb_cig=self.starting_nb_cig,
+            ref_price_per_cig=PackManager.get_ref_price_per_cig(self.user),
         )
+        StatsCache(self.user).bump_version()
         return userprofile
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+"""
+This module forecasts user cigarettes per day with least squares trends
+(linear or exponential decay) fitted on per-day counts since date_start.
+Fits only keep running sums, so a cached forecast is extended with new
+days without cigarettes, without fitting the whole history again
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+from django.core.cache import caches
+
+from QuitSoonApp.models import UserProfile, DailyLedger
+from .stats_cache import StatsCache
+
+
+class TrendFit:
+    """Least squares fit of y = a + b * x from running sums of points"""
+
+    def __init__(self, n=0, sx=0, sy=0, sxx=0, sxy=0, syy=0):
+        self.n, self.sx, self.sy = float(n), float(sx), float(sy)
+        self.sxx, self.sxy, self.syy = float(sxx), float(sxy), float(syy)
+
+    @classmethod
+    def from_arrays(cls, x, y):
+        return cls(len(x), x.sum(), y.sum(), (x * x).sum(), (x * y).sum(), (y * y).sum())
+
+    def add(self, x, y, sign=1):
+        """add (or remove with sign=-1) one point"""
+        self.n += sign
+        self.sx += sign * x
+        self.sy += sign * y
+        self.sxx += sign * x * x
+        self.sxy += sign * x * y
+        self.syy += sign * y * y
+
+    def solve(self):
+        """(a, b, sigma of residuals), None if less than 2 distinct x"""
+        if self.n < 2 or self.n * self.sxx - self.sx ** 2 <= 0:
+            return None
+        (a, b), *_ = np.linalg.lstsq(
+            np.array([[self.n, self.sx], [self.sx, self.sxx]]),
+            np.array([self.sy, self.sxy]),
+            rcond=None,
+            )
+        residuals = self.syy - a * self.sy - b * self.sxy
+        sigma = np.sqrt(max(residuals, 0) / (self.n - 2)) if self.n > 2 else 0.0
+        return float(a), float(b), float(sigma)
+
+
+class SmokeForecast:
+    """Cigarettes per day trends since date_start and their projected zero date"""
+
+    MODELS = ['linear', 'exponential']
+    # confidence band of about 95%
+    Z = 1.96
+    # under half a cigarette per day, a forecast rounds to zero
+    ZERO = 0.5
+
+    def __init__(self, date_start, lastday, counts):
+        self.date_start = date_start
+        self.lastday = lastday
+        self.counts = np.asarray(counts, dtype=np.int64)
+        x = np.arange(len(self.counts), dtype=float)
+        smoking = self.counts > 0
+        self.fits = {
+            'linear': TrendFit.from_arrays(x, self.counts.astype(float)),
+            'exponential': TrendFit.from_arrays(x[smoking], np.log(self.counts[smoking])),
+            }
+
+    @classmethod
+    def from_ledger(cls, user, lastday):
+        """fit from user per-day counts, fetched in one query"""
+        date_start = UserProfile.objects.get(user=user).date_start
+        counts = np.zeros(max((lastday - date_start).days + 1, 0), dtype=np.int64)
+        days = DailyLedger.objects.filter(
+            user=user, date__range=(date_start, lastday), nb_cig__gt=0,
+            ).values_list('date', 'nb_cig')
+        for day, nb_cig in days:
+            counts[(day - date_start).days] = nb_cig
+        return cls(date_start, lastday, counts)
+
+    def extend(self, lastday):
+        """add days without cigarettes until lastday"""
+        nb_days = (lastday - self.date_start).days + 1
+        for offset in range(len(self.counts), nb_days):
+            self.fits['linear'].add(offset, 0)
+        if nb_days > len(self.counts):
+            self.counts = np.append(
+                self.counts, np.zeros(nb_days - len(self.counts), dtype=np.int64))
+            self.lastday = lastday
+
+    def predict(self, model, x, shift=0):
+        """cigarettes per day at day offsets x, shifting trend by shift sigmas"""
+        a, b, sigma = self.fits[model].solve()
+        if model == 'linear':
+            return np.maximum(a + shift * sigma + b * x, 0)
+        return np.exp(a + shift * sigma + b * x)
+
+    def zero_offset(self, model, shift=0):
+        """first day offset predicted under ZERO cigarettes, None if never"""
+        a, b, sigma = self.fits[model].solve()
+        a += shift * sigma
+        if model == 'linear':
+            level = self.ZERO
+        else:
+            level = np.log(self.ZERO)
+        if b >= 0:
+            return None if a >= level else 0
+        return max(int(np.ceil((level - a) / b)), 0)
+
+    def day(self, offset):
+        if offset is None:
+            return None
+        return self.date_start + timedelta(days=offset)
+
+    def zero_date(self, model='linear'):
+        """projected zero cigarette date with confidence band: (date, earliest, latest)"""
+        if not self.fits[model].solve():
+            return None
+        return (
+            self.day(self.zero_offset(model)),
+            self.day(self.zero_offset(model, -self.Z)),
+            self.day(self.zero_offset(model, self.Z)),
+            )
+
+    def forecast(self, nb_days, model='linear'):
+        """[{'date', 'nb_cig', 'low', 'high'}] for the nb_days following lastday"""
+        if not self.fits[model].solve():
+            return []
+        x = np.arange(len(self.counts), len(self.counts) + nb_days, dtype=float)
+        predictions = zip(
+            x,
+            self.predict(model, x),
+            self.predict(model, x, -self.Z),
+            self.predict(model, x, self.Z),
+            )
+        return [
+            {
+                'date': self.day(int(offset)),
+                'nb_cig': float(nb_cig),
+                'low': float(low),
+                'high': float(high),
+            }
+            for offset, nb_cig, low, high in predictions
+            ]
+
+    @staticmethod
+    def cache_key(user):
+        # any change of user data bumps its version, an old fit is never read again
+        return 'forecast:{}:{}'.format(user.id, StatsCache(user).version)
+
+    @classmethod
+    def get(cls, user, lastday):
+        """get user forecast from cache, extended until lastday, or fit it"""
+        cache = caches['stats']
+        key = cls.cache_key(user)
+        forecast = cache.get(key)
+        if forecast is None or forecast.lastday > lastday:
+            forecast = cls.from_ledger(user, lastday)
+        else:
+            forecast.extend(lastday)
+        cache.set(key, forecast)
+        return forecast
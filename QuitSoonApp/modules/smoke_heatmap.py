@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+"""
+This module counts user cigarettes per weekday and hour of day
+"""
+
+import numpy as np
+
+from django.db.models.functions import ExtractWeekDay, ExtractHour
+from django.utils.functional import cached_property
+
+from QuitSoonApp.models import ConsoCig
+
+
+class SmokeHeatmap:
+    """7 x 24 matrix of user consumption, rows from monday to sunday, columns hours of day"""
+
+    WEEKDAYS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+    def __init__(self, user, date_start=None, lastday=None):
+        self.user = user
+        self.user_conso = ConsoCig.objects.filter(user=self.user)
+        if date_start:
+            self.user_conso = self.user_conso.filter(date_cig__gte=date_start)
+        if lastday:
+            self.user_conso = self.user_conso.filter(date_cig__lte=lastday)
+
+    @cached_property
+    def matrix(self):
+        """count cigarettes in each (weekday, hour) cell from one fetch"""
+        rows = self.user_conso.annotate(
+            weekday=ExtractWeekDay('date_cig'),
+            hour=ExtractHour('time_cig'),
+            ).values_list('weekday', 'hour')
+        datas = np.array(list(rows), dtype=np.int64).reshape(-1, 2)
+        # ExtractWeekDay gives 1 for sunday to 7 for saturday, get 0 for monday
+        weekdays = (datas[:, 0] + 5) % 7
+        cells = np.bincount(weekdays * 24 + datas[:, 1], minlength=7 * 24)
+        return cells.reshape(7, 24)
+
+    @property
+    def rows(self):
+        """[(weekday name, [nb cig for each hour])] for templates"""
+        return [(name, row.tolist()) for name, row in zip(self.WEEKDAYS, self.matrix)]
@@ -1,16 +1,27 @@
 #!/usr/bin/env python
 
+from datetime import datetime, time, timedelta
+
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.db.utils import IntegrityError
 
 from QuitSoonApp.models import Paquet, ConsoCig
+from .ledger_manager import LedgerManager
+from .last_used_manager import LastUsedManager
+from .stats_cache import StatsCache
+from .trophee_manager import TropheeManager
 
 
 class SmokeManager:
     """Manage informations of cigarette consumption"""
 
-    def __init__(self, user, datas):
+    # waking hours over which cigarettes logged in bulk are spread
+    DAY_START = time(8, 0)
+    DAY_END = time(23, 0)
+
+    def __init__(self, user, datas, paquet=None):
         self.datas = datas
         self.user = user
         self.id = self.get_request_data('id_smoke')
@@ -18,6 +29,12 @@ class SmokeManager:
             self.date_cig = self.get_request_data('date_smoke')
             self.time_cig = self.get_request_data('time_smoke')
             self.given = self.get_request_data('given_field')
+            # bulk mode: nb_cig cigarettes per day from date_smoke to date_end
+            self.nb_cig = self.get_request_data('nb_cig') or 1
+            self.date_end = self.get_request_data('date_end') or self.date_cig
+        # memoized lookups, pack may be already loaded by caller (from SmokeForm catalog)
+        self._conso_cig = None
+        self._pack = paquet
 
     def get_request_data(self, data):
         try:
@@ -27,9 +44,14 @@ class SmokeManager:
 
     @property
     def get_conso_cig(self):
+        if self._conso_cig is None:
+            self._conso_cig = self.find_conso_cig()
+        return self._conso_cig
+
+    def find_conso_cig(self):
         try:
             if self.id:
-                smoke = ConsoCig.objects.get(id=self.id)
+                smoke = ConsoCig.objects.select_related('paquet').get(id=self.id)
             else:
                 smoke = ConsoCig.objects.get(
                     user=self.user,
@@ -44,6 +66,11 @@ class SmokeManager:
 
     @property
     def get_pack(self):
+        if self._pack is None:
+            self._pack = self.find_pack()
+        return self._pack
+
+    def find_pack(self):
         try:
             if self.id:
                 # when user wants to delete a smoke, smoke id is returned in request
@@ -62,21 +89,98 @@ class SmokeManager:
     def create_conso_cig(self):
         """Create pack from datas"""
         try:
-            newconsocig = ConsoCig.objects.create(
-                user=self.user,
-                date_cig=self.date_cig,
-                time_cig=self.time_cig,
-                paquet=self.get_pack,
-                given=self.given,
-                )
+            with transaction.atomic():
+                newconsocig = ConsoCig.objects.create(
+                    user=self.user,
+                    date_cig=self.date_cig,
+                    time_cig=self.time_cig,
+                    paquet=self.get_pack,
+                    given=self.given,
+                    )
+                LedgerManager(self.user).add_conso_cig(newconsocig)
+                LastUsedManager(self.user).add_conso_cig(newconsocig)
+                TropheeManager(self.user).add_conso_cig(newconsocig)
+            StatsCache(self.user).bump_version()
             self.id = newconsocig.id
+            self._conso_cig = newconsocig
             return newconsocig
         except (IntegrityError, AttributeError):
             return None
 
+    @property
+    def is_bulk(self):
+        return not self.id and (self.nb_cig > 1 or self.date_end != self.date_cig)
+
+    @property
+    def bulk_counts(self):
+        """{date: nb cigarettes} of bulk datas, nb_cig each day from date_smoke to date_end"""
+        nb_days = (self.date_end - self.date_cig).days + 1
+        return {self.date_cig + timedelta(days=offset): self.nb_cig for offset in range(nb_days)}
+
+    def spread_times(self, date, nb_cig):
+        """
+        nb_cig times evenly spread over waking hours of date, last one at DAY_END,
+        or at time_smoke on date_end (time of the form) for a backfill ending now.
+        A time_smoke at midnight leaves no time before it, waking hours are kept
+        """
+        start, end = self.DAY_START, self.DAY_END
+        if date == self.date_end and self.time_cig and self.time_cig != time(0, 0):
+            end = self.time_cig
+            if end <= start:
+                start = time(0, 0)
+        start = datetime.combine(date, start)
+        step = (datetime.combine(date, end) - start) / nb_cig
+        return [(start + step * (i + 1)).time().replace(microsecond=0) for i in range(nb_cig)]
+
+    def create_bulk_conso_cig(self, counts=None):
+        """
+        Create many ConsoCig at once, counts {date: nb cigarettes} defaulting to
+        bulk datas, with a single bulk_create. Return created ConsoCig
+        """
+        counts = counts or self.bulk_counts
+        consos = [
+            ConsoCig(
+                user=self.user,
+                date_cig=date,
+                time_cig=time_cig,
+                paquet=self.get_pack,
+                given=self.given,
+                )
+            for date, nb_cig in sorted(counts.items()) if nb_cig > 0
+            for time_cig in self.spread_times(date, nb_cig)
+            ]
+        if not consos:
+            return []
+        with transaction.atomic():
+            ConsoCig.objects.bulk_create(consos)
+            LedgerManager(self.user).add_conso_cigs(consos)
+            LastUsedManager(self.user).add_conso_cig(consos[-1])
+            trophees = TropheeManager(self.user)
+            last_smoke_date = trophees.userprofile and trophees.progress.last_smoke_date
+            if trophees.rebuilt is None and last_smoke_date and consos[0].date_cig < last_smoke_date:
+                # backfilled days may break smoke free runs already awarded,
+                # unless progress was just built from history
+                trophees.rebuild()
+            else:
+                trophees.add_conso_cigs(consos)
+        StatsCache(self.user).bump_version()
+        return consos
+
     def delete_conso_cig(self):
         try:
             if self.id:
-                self.get_conso_cig.delete()
+                conso = self.get_conso_cig
+                with transaction.atomic():
+                    conso.delete()
+                    LedgerManager(self.user).remove_conso_cig(conso)
+                    LastUsedManager(self.user).remove_conso_cig(conso)
+                    TropheeManager(self.user).remove_conso_cig(conso)
+                StatsCache(self.user).bump_version()
+                self.clear_lookups()
         except AttributeError:
             pass
+
+    def clear_lookups(self):
+        """forget memoized conso and pack, once deleted"""
+        self._conso_cig = None
+        self._pack = None
@@ -4,9 +4,13 @@ from datetime import date, datetime, timedelta
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Sum
 from django.db.utils import IntegrityError
+from django.utils.dateparse import parse_date
+from django.utils.functional import cached_property
 
-from QuitSoonApp.models import UserProfile, Paquet, ConsoCig
+from QuitSoonApp.models import UserProfile, ConsoCig, DailyLedger
+from .day_calendar import DayCalendar
 
 
 class SmokeStats:
@@ -15,18 +19,39 @@ class SmokeStats:
     def __init__(self, user, lastday):
         self.user = user
         self.lastday = lastday
-        self.date_start = UserProfile.objects.get(user=self.user).date_start
+        self.userprofile = UserProfile.objects.get(user=self.user)
+        self.date_start = self.userprofile.date_start
         self.nb_jour_since_start = (self.lastday - self.date_start).days + 1
         self.user_conso = ConsoCig.objects.filter(user=self.user)
+        self.user_ledger = DailyLedger.objects.filter(user=self.user)
+
+    @cached_property
+    def histogram(self):
+        """
+        Per-day histogram of user consumption between date_start and lastday,
+        loaded in one query from DailyLedger {date_cig: (nb_cig, money_smoked)}
+        """
+        days = self.user_ledger.filter(
+            date__range=(self.date_start, self.lastday), nb_cig__gt=0,
+            ).values_list(
+            'date', 'nb_cig', 'money_smoked',
+            ).order_by('date')
+        return {day: (nb_cig, money) for day, nb_cig, money in days}
+
+    @cached_property
+    def calendar(self):
+        """Smoking days calendar since date_start, built from histogram without new query"""
+        return DayCalendar(self.date_start, self.lastday, self.histogram.keys())
 
     def nb_per_day(self, date):
         # nb smoke per day
-        conso_day = self.user_conso.filter(date_cig=date)
-        return conso_day.count()
+        if isinstance(date, str):
+            date = parse_date(date)
+        return self.histogram.get(date, (0, 0))[0]
 
     @property
     def total_smoke(self):
-        return self.user_conso.count()
+        return sum(nb_cig for nb_cig, money in self.histogram.values())
 
     @property
     def average_per_day(self):
@@ -34,8 +59,7 @@ class SmokeStats:
 
     @property
     def count_smoking_day(self):
-        smoking_days = ConsoCig.objects.order_by('date_cig').distinct('date_cig')
-        return smoking_days.count()
+        return self.calendar.count_smoking_day
 
     @property
     def count_no_smoking_day(self):
@@ -43,32 +67,44 @@ class SmokeStats:
 
     @property
     def no_smoking_day(self):
-        no_smoking_day = []
-        start = datetime.combine(self.date_start, datetime.min.time())
-        lastday = datetime.combine(self.lastday, datetime.min.time())
-        delta =  lastday - start
-        for i in range(delta.days + 1):
-            day = start + timedelta(days=i)
-            if not self.user_conso.filter(date_cig=day).exists():
-                no_smoking_day.append(day.date())
-        return no_smoking_day
+        return self.calendar.no_smoking_day
+
+    @property
+    def current_streak(self):
+        return self.calendar.current_streak
+
+    @property
+    def longest_streak(self):
+        return self.calendar.longest_streak
+
+    @property
+    def streaks(self):
+        return self.calendar.streaks
 
     @property
     def total_money_smoked(self):
-        money_smoked = 0
-        for conso in self.user_conso:
-            if conso.paquet:
-                money_smoked += conso.paquet.price_per_cig
-        return money_smoked
+        return sum(self.money_smoked_per_day.values(), 0)
+
+    @property
+    def money_smoked_per_day(self):
+        """{date_cig: money smoked}, summed in DB when updating DailyLedger"""
+        return {day: money for day, (nb_cig, money) in self.histogram.items()}
+
+    @cached_property
+    def money_smoked_per_pack(self):
+        """{paquet id: money smoked}, summed in DB in one grouped query"""
+        packs = self.user_conso.filter(
+            date_cig__range=(self.date_start, self.lastday), given=False, paquet__isnull=False,
+            ).values('paquet').annotate(
+            money=Sum('paquet__price_per_cig'),
+            ).order_by('paquet')
+        return {pack['paquet']: pack['money'] or 0 for pack in packs}
 
     @property
     def total_money_with_starting_nb_cig(self):
-        money = 0
-        #get first pack created
-        starting_nb_cig = UserProfile.objects.get(user=self.user).starting_nb_cig
-        first_pack = Paquet.objects.all()[0]
-        money += self.nb_jour_since_start * first_pack.price_per_cig * starting_nb_cig
-        return money
+        # money user would have spent smoking as before, at his reference price
+        ref_price_per_cig = self.userprofile.ref_price_per_cig or 0
+        return self.nb_jour_since_start * ref_price_per_cig * self.userprofile.starting_nb_cig
 
     @property
     def money_saved(self):
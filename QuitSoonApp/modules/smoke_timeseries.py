@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""
+This module aggregates user daily ledger into day, week or month buckets
+in the DB, so that charts get a bounded number of points whatever the
+length of user history
+"""
+
+from django.db.models import Sum, DateField
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+
+from QuitSoonApp.models import DailyLedger
+
+
+class SmokeTimeseries:
+    """Cigarettes, money smoked and activity minutes per bucket between two dates"""
+
+    # bucket name: (truncate function, approximative nb days in bucket)
+    BUCKETS = {
+        'day': (TruncDay, 1),
+        'week': (TruncWeek, 7),
+        'month': (TruncMonth, 31),
+    }
+    MAX_POINTS = 100
+
+    def __init__(self, user, date_start, lastday, max_points=MAX_POINTS, bucket=None):
+        self.user = user
+        self.date_start = date_start
+        self.lastday = lastday
+        self.max_points = max(max_points, 1)
+        self.bucket = bucket if bucket in self.BUCKETS else self.get_bucket()
+
+    def get_bucket(self):
+        """smallest bucket giving at most max_points points"""
+        nb_days = (self.lastday - self.date_start).days + 1
+        for bucket, (trunc, bucket_days) in self.BUCKETS.items():
+            if nb_days / bucket_days <= self.max_points:
+                return bucket
+        return 'month'
+
+    @property
+    def points(self):
+        """[{'date', 'nb_cig', 'money_smoked', 'activity_duration'}] summed per bucket in one query"""
+        trunc = self.BUCKETS[self.bucket][0]
+        rows = DailyLedger.objects.filter(
+            user=self.user,
+            date__range=(self.date_start, self.lastday),
+            ).annotate(
+                bucket=trunc('date', output_field=DateField()),
+            ).values('bucket').annotate(
+                nb_cig=Sum('nb_cig'),
+                money_smoked=Sum('money_smoked'),
+                activity_duration=Sum('activity_duration'),
+            ).order_by('bucket')
+        return [
+            {
+                'date': row['bucket'],
+                'nb_cig': row['nb_cig'],
+                'money_smoked': row['money_smoked'],
+                'activity_duration': row['activity_duration'],
+            }
+            for row in rows
+            ]
+
+    def as_dict(self):
+        return {
+            'start': self.date_start,
+            'end': self.lastday,
+            'bucket': self.bucket,
+            'points': self.points,
+            }
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+"""
+This module caches SmokeStats results per user.
+Cache keys contain a per-user data version, bumped by each action modifying
+user datas, so that an outdated report is never read again
+"""
+
+import time
+
+from django.core.cache import caches
+
+from .smoke_stats import SmokeStats
+
+
+class StatsCache:
+    """Get SmokeStats reports from cache or compute them on cache miss"""
+
+    STATS = [
+        'total_smoke',
+        'average_per_day',
+        'count_smoking_day',
+        'count_no_smoking_day',
+        'no_smoking_day',
+        'current_streak',
+        'longest_streak',
+        'total_money_smoked',
+        'money_saved',
+    ]
+
+    def __init__(self, user):
+        self.user = user
+        self.cache = caches['stats']
+        self.version_key = 'version:{}'.format(self.user.id)
+
+    @staticmethod
+    def new_version():
+        # time based (microseconds) so that a lost version never gives back an old one
+        return time.time_ns() // 1000
+
+    @property
+    def version(self):
+        """get user data version, initialize it if not in cache"""
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, self.new_version(), None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def bump_version(self):
+        """invalidate all cached reports of user"""
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, self.new_version(), None)
+
+    def stats_key(self, lastday):
+        return 'stats:{}:{}:{}'.format(self.user.id, lastday.isoformat(), self.version)
+
+    def count(self, counter):
+        key = 'counter:{}'.format(counter)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, None):
+                self.cache.incr(key)
+
+    @classmethod
+    def counters(cls):
+        """get cache hits and misses counters"""
+        cache = caches['stats']
+        return {
+            'hits': cache.get('counter:hits', 0),
+            'misses': cache.get('counter:misses', 0),
+            }
+
+    @classmethod
+    def compute_stats(cls, user, lastday):
+        smoke_stats = SmokeStats(user, lastday)
+        stats = {'date_start': smoke_stats.date_start}
+        for stat in cls.STATS:
+            stats[stat] = getattr(smoke_stats, stat)
+        return stats
+
+    def get_stats(self, lastday):
+        """get user stats report until lastday"""
+        key = self.stats_key(lastday)
+        stats = self.cache.get(key)
+        if stats is None:
+            self.count('misses')
+            stats = self.compute_stats(self.user, lastday)
+            self.cache.set(key, stats)
+        else:
+            self.count('hits')
+        return stats
+
+    def set_stats(self, lastday, stats):
+        """store an already computed stats report"""
+        self.cache.set(self.stats_key(lastday), stats)
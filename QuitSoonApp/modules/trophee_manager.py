@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+"""
+This module awards user trophies as cigarettes are saved or deleted.
+A small TropheeProgress state (last smoking day, nb cigarettes since date_start)
+is checked against sorted thresholds ladders with bisect, without reading
+user history again
+"""
+
+from bisect import bisect_right
+from datetime import date, timedelta
+
+import numpy as np
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.functional import cached_property
+
+from ..models import UserProfile, ConsoCig, Trophee, TropheeProgress
+from .day_calendar import DayCalendar
+
+
+class TropheeManager:
+    """Update user TropheeProgress and award reached trophies"""
+
+    # smoke free days in a row, saved as Trophee(nb_cig=0, nb_jour=days)
+    DAYS = [1, 2, 3, 7, 14, 21, 30, 60, 90, 180, 365]
+    # cigarettes avoided since date_start, saved as Trophee(nb_cig=nb, nb_jour=0)
+    CIGS = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+    def __init__(self, user):
+        self.user = user
+        self.userprofile = UserProfile.objects.filter(user=self.user).first()
+        # trophies awarded when missing progress was just built from history
+        self.rebuilt = None
+
+    @cached_property
+    def progress(self):
+        """user TropheeProgress, built from history if missing"""
+        progress = TropheeProgress.objects.filter(user=self.user).first()
+        if progress is None:
+            # until last smoking day, later days are awarded by check
+            last_smoke_date = ConsoCig.objects.filter(
+                user=self.user).aggregate(last=Max('date_cig'))['last']
+            self.rebuilt = self.rebuild(max(
+                last_smoke_date or self.userprofile.date_start, self.userprofile.date_start))
+            progress = self.progress
+        return progress
+
+    def smoke_free_run(self, day):
+        """nb smoke free days in a row until day included"""
+        first_day = self.userprofile.date_start
+        if self.progress.last_smoke_date:
+            if self.progress.last_smoke_date >= day:
+                return 0
+            first_day = max(first_day, self.progress.last_smoke_date + timedelta(days=1))
+        return max((day - first_day).days + 1, 0)
+
+    def cig_avoided(self, day):
+        """cigarettes user would have smoked as before since date_start, minus smoked ones"""
+        nb_days = (day - self.userprofile.date_start).days + 1
+        return nb_days * self.userprofile.starting_nb_cig - self.progress.nb_cig
+
+    def award(self, ladder, level_field, value, new_trophee):
+        """create trophies of thresholds reached since last award, return them"""
+        last_level = getattr(self.progress, level_field)
+        level = bisect_right(ladder, value)
+        if level <= last_level:
+            return []
+        new_trophees = [new_trophee(threshold) for threshold in ladder[last_level:level]]
+        Trophee.objects.bulk_create(new_trophees, ignore_conflicts=True)
+        setattr(self.progress, level_field, level)
+        self.progress.save(update_fields=[level_field])
+        return new_trophees
+
+    def award_days(self, nb_days):
+        return self.award(
+            self.DAYS, 'days_level', nb_days,
+            lambda threshold: Trophee(user=self.user, nb_cig=0, nb_jour=threshold),
+            )
+
+    def award_cigs(self, nb_cig):
+        return self.award(
+            self.CIGS, 'cig_level', nb_cig,
+            lambda threshold: Trophee(user=self.user, nb_cig=threshold, nb_jour=0),
+            )
+
+    def check(self, day=None):
+        """award trophies reached until day (default today), return new trophies"""
+        if not self.userprofile:
+            return []
+        day = day or date.today()
+        # missing progress is built first, its trophies are new too
+        self.progress
+        return (self.rebuilt or []) + self.award_days(self.smoke_free_run(day)) + self.award_cigs(self.cig_avoided(day))
+
+    def add_conso_cig(self, conso):
+        return self.add_conso_cigs([conso])
+
+    def add_conso_cigs(self, consos):
+        """
+        add cigarettes sorted by date, none before last smoking day,
+        saving progress once
+        """
+        if not self.userprofile:
+            return []
+        if self.progress and self.rebuilt is not None:
+            # built from history, these cigarettes already counted
+            return self.rebuilt
+        new_trophees = []
+        for conso in consos:
+            # smoke free run ends the day before this cigarette
+            new_trophees += self.award_days(self.smoke_free_run(conso.date_cig - timedelta(days=1)))
+            if not self.progress.last_smoke_date or conso.date_cig > self.progress.last_smoke_date:
+                self.progress.last_smoke_date = conso.date_cig
+            if conso.date_cig >= self.userprofile.date_start:
+                self.progress.nb_cig += 1
+        self.progress.save(update_fields=['last_smoke_date', 'nb_cig'])
+        return new_trophees
+
+    def remove_conso_cig(self, conso):
+        if not self.userprofile:
+            return []
+        if self.progress and self.rebuilt is not None:
+            return self.rebuilt
+        if conso.date_cig == self.progress.last_smoke_date:
+            # conso already deleted, one indexed lookup for previous smoking day
+            self.progress.last_smoke_date = ConsoCig.objects.filter(
+                user=self.user).aggregate(last=Max('date_cig'))['last']
+        if conso.date_cig >= self.userprofile.date_start:
+            self.progress.nb_cig -= 1
+        self.progress.save(update_fields=['last_smoke_date', 'nb_cig'])
+        return self.check()
+
+    def rebuild(self, lastday=None):
+        """Recompute user progress and trophies from raw ConsoCig history"""
+        if not self.userprofile:
+            return []
+        lastday = lastday or date.today()
+        date_start = self.userprofile.date_start
+        smoke_days = dict(ConsoCig.objects.filter(
+            user=self.user, date_cig__lte=lastday).values_list('date_cig').annotate(
+                nb_cig=Count('id')).order_by())
+        calendar = DayCalendar(date_start, lastday, smoke_days.keys())
+        # cigarettes avoided at the end of each day, best value ever reached
+        nb_per_day = np.zeros(len(calendar), dtype=np.int64)
+        for day, nb_cig in smoke_days.items():
+            offset = calendar.offset(day)
+            if offset is not None:
+                nb_per_day[offset] = nb_cig
+        avoided = (np.arange(1, len(calendar) + 1) * self.userprofile.starting_nb_cig
+                   - np.cumsum(nb_per_day))
+        with transaction.atomic():
+            Trophee.objects.filter(user=self.user).delete()
+            self.progress, created = TropheeProgress.objects.get_or_create(user=self.user)
+            self.progress.last_smoke_date = max(smoke_days, default=None)
+            self.progress.nb_cig = int(nb_per_day.sum())
+            self.progress.days_level = 0
+            self.progress.cig_level = 0
+            self.progress.save()
+            return (self.award_days(calendar.longest_streak)
+                    + self.award_cigs(int(avoided.max()) if avoided.size else 0))
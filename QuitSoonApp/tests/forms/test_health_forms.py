@@ -2,6 +2,7 @@
 
 import datetime
 
+from django.core.cache import caches
 from django.test import TransactionTestCase, TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
@@ -9,12 +10,14 @@ from django.contrib.auth.models import User
 
 from QuitSoonApp.forms import HealthForm
 from QuitSoonApp.models import Alternative, ConsoAlternative
+from QuitSoonApp.modules import LastUsedManager, CatalogCache
 
 
 class Test_HealthForm(TestCase):
 
     def setUp(self):
         """setup tests"""
+        caches['stats'].clear()
         self.usertest = User.objects.create_user(
             username="arandomname", email="random@email.com", password="arandompassword")
         self.db_alternative_undisplayed = Alternative.objects.create(
@@ -152,6 +155,36 @@ class test_HealthForm_field_config(Test_HealthForm):
         self.assertEqual(form.initial['so_field'][0], self.db_alternative_activity_so2.id)
         self.assertEqual(form.initial['su_field'][0], self.db_alternative_substitut_past.id)
 
+    def test_HealthForm_queries(self):
+        """ test HealthForm built from cached user catalog and last used alternatives """
+        LastUsedManager(self.usertest).rebuild()
+        with self.assertNumQueries(3):
+            HealthForm(self.usertest)
+        # catalog cached across requests, only last used alternatives are read
+        with self.assertNumQueries(1):
+            HealthForm(self.usertest)
+        for i in range(30):
+            Alternative.objects.create(
+                user=self.usertest,
+                type_alternative='Ac',
+                type_activity='Lo',
+                activity='LOISIR{}'.format(i),
+                display=True,
+                )
+        CatalogCache(self.usertest).clear()
+        data = {
+            'date_health':datetime.date(2020, 5, 26),
+            'time_health':datetime.time(12, 56),
+            'type_alternative_field':'Su',
+            'su_field':self.db_alternative_substitut_ecig.id,
+            'ecig_vape_or_start':[]
+        }
+        with self.assertNumQueries(3):
+            form = HealthForm(self.usertest, data)
+            self.assertFalse(form.is_valid())
+        self.assertEqual(len(form.fields['lo_field'].choices), 30)
+        self.assertEqual(len(form.fields['type_alternative_field'].choices), 4)
+
 class Test_HealthForm_validation_data(Test_HealthForm):
 
     def test_valid_data(self):
@@ -202,6 +235,7 @@ class Test_HealthForm_ECIG(TestCase):
 
     def setUp(self):
         """setup tests"""
+        caches['stats'].clear()
         self.usertest = User.objects.create_user(
             username="arandomname", email="random@email.com", password="arandompassword")
         self.db_alternative_undisplayed = Alternative.objects.create(
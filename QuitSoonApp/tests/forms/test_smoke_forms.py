@@ -2,17 +2,20 @@
 
 import datetime
 
+from django.core.cache import caches
 from django.test import TestCase
 from django.contrib.auth.models import User
 
 from QuitSoonApp.forms import SmokeForm
 from QuitSoonApp.models import Paquet, ConsoCig
+from QuitSoonApp.modules import LastUsedManager
 
 class test_SmokeForm(TestCase):
     """test PaquetFormCreation"""
 
     def setUp(self):
         """setup tests"""
+        caches['stats'].clear()
         self.usertest = User.objects.create_user(
             username="arandomname", email="random@email.com", password="arandompassword")
         self.db_pack_undisplayed = Paquet.objects.create(
@@ -67,6 +70,38 @@ class test_SmokeForm(TestCase):
         form = SmokeForm(self.usertest, self.valid_datas)
         self.assertTrue(form.is_valid())
 
+    def test_selected_pack(self):
+        """test SmokeForm.selected_pack found in user packs, None if given"""
+        form = SmokeForm(self.usertest, self.valid_datas)
+        self.assertTrue(form.is_valid())
+        with self.assertNumQueries(0):
+            self.assertEqual(form.selected_pack, self.db_pack_ind)
+        self.valid_datas['given_field'] = True
+        form = SmokeForm(self.usertest, self.valid_datas)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.selected_pack, None)
+
+    def test_SmokeForm_bulk(self):
+        """test SmokeForm bulk fields and date range validation"""
+        self.valid_datas['nb_cig'] = 12
+        self.valid_datas['date_end'] = datetime.date(2020, 6, 1)
+        form = SmokeForm(self.usertest, self.valid_datas)
+        self.assertTrue(form.is_valid())
+        self.valid_datas['date_end'] = datetime.date(2020, 5, 20)
+        form = SmokeForm(self.usertest, self.valid_datas)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors, {
+            '__all__': ["La date de fin doit être postérieure à la date de début"],
+            })
+        self.valid_datas['date_end'] = datetime.date(2020, 7, 26)
+        form = SmokeForm(self.usertest, self.valid_datas)
+        self.assertFalse(form.is_valid())
+        self.valid_datas['date_end'] = None
+        self.valid_datas['nb_cig'] = 0
+        form = SmokeForm(self.usertest, self.valid_datas)
+        self.assertFalse(form.is_valid())
+        self.assertIn('nb_cig', form.errors)
+
     def test_SmokeForm_is_not_valid(self):
         """test invalid SmokeForm, datas missing"""
         form = SmokeForm(self.usertest, {})
@@ -164,3 +199,27 @@ class test_SmokeForm(TestCase):
             form.config_field('rol_pack_field', 'ROL'),
             ((pack3.id, "{} /{}{}".format(pack3.brand, pack3.qt_paquet, pack3.unit)),)
             )
+
+    def test_SmokeForm_queries(self):
+        """ test SmokeForm built from cached user catalog and last smoke """
+        for day in range(1, 20):
+            ConsoCig.objects.create(
+                user=self.usertest,
+                date_cig=datetime.date(2020, 6, day),
+                time_cig=datetime.time(10, 15),
+                paquet=self.db_pack_rol if day == 10 else None,
+                given=day != 10,
+                )
+        LastUsedManager(self.usertest).rebuild()
+        with self.assertNumQueries(3):
+            form = SmokeForm(self.usertest)
+        # catalog cached across requests, only last used pack is read
+        with self.assertNumQueries(1):
+            form = SmokeForm(self.usertest)
+        self.assertEqual(form.fields['type_cig_field'].choices, [
+            ('IND', 'Cigarettes'),
+            ('ROL', 'Tabac à rouler'),
+            ])
+        self.assertEqual(form.initial['type_cig_field'], ('ROL', 'Tabac à rouler'))
+        self.assertEqual(form.initial['rol_pack_field'][0], self.db_pack_rol.id)
+        self.assertNotIn('ind_pack_field', form.initial)
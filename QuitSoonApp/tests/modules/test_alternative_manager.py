@@ -1,6 +1,8 @@
 from decimal import Decimal
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.test import TestCase
 from django.contrib.auth.models import User
 
@@ -235,3 +237,60 @@ class SavePackTestCase(TestCase):
             )
         self.assertTrue(filter_alternative.exists())
         self.assertEqual(filter_alternative[0].display, False)
+
+    def test_create_alternative_upsert(self):
+        """test AlternativeManager.create_alternative displays again a hidden alternative with NULL columns"""
+        db_alternative = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Ac',
+            type_activity='Sp',
+            activity='COURSE',
+            display=False,
+            )
+        datas = {
+            'type_alternative':'Ac',
+            'type_activity':'Sp',
+            'activity':'COURSE',
+            }
+        with self.assertNumQueries(1):
+            newalternative = AlternativeManager(self.usertest, datas).upsert_alternative()
+        AlternativeManager(self.usertest, datas).create_alternative()
+        self.assertEqual(newalternative.id, db_alternative.id)
+        self.assertTrue(newalternative.display)
+        self.assertEqual(Alternative.objects.filter(user=self.usertest).count(), 1)
+        self.assertTrue(Alternative.objects.get(id=db_alternative.id).display)
+
+    def test_create_substitut_upsert(self):
+        """test AlternativeManager.create_alternative keeps one substitut per nicotine dosage"""
+        datas = {'type_alternative':'Su', 'substitut':'P24', 'nicotine': 2}
+        first = AlternativeManager(self.usertest, datas).create_alternative()
+        second = AlternativeManager(self.usertest, datas).create_alternative()
+        other = AlternativeManager(self.usertest, {
+            'type_alternative':'Su', 'substitut':'P24', 'nicotine': 4}).create_alternative()
+        self.assertEqual(first.id, second.id)
+        self.assertNotEqual(first.id, other.id)
+        self.assertEqual(Alternative.objects.filter(user=self.usertest).count(), 2)
+
+    def test_delete_used_alternative_one_update(self):
+        """test AlternativeManager.delete_alternative hides a used alternative in one UPDATE, row locked first"""
+        db_alternative = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Ac',
+            type_activity='So',
+            activity='PSYCHOLOGUE',
+            )
+        ConsoAlternative.objects.create(
+            user=self.usertest,
+            date_alter=datetime.date(2020, 5, 13),
+            time_alter=datetime.time(13, 55),
+            alternative=db_alternative,
+        )
+        alternative = AlternativeManager(self.usertest, {'id_alternative': db_alternative.id})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(alternative.delete_alternative())
+        statements = [query['sql'].split()[0] for query in queries
+                      if '"{}"'.format(Alternative._meta.db_table) in query['sql']]
+        # row locked, then hidden in one UPDATE
+        self.assertEqual(statements, ['SELECT', 'UPDATE'])
+        self.assertFalse(Alternative.objects.get(id=db_alternative.id).display)
+        self.assertFalse(AlternativeManager(self.usertest, {'id_alternative': 0}).delete_alternative())
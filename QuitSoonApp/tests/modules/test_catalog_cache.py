@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""Module testing catalog_cache module"""
+
+import datetime
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import Paquet, ConsoCig, Alternative
+from QuitSoonApp.modules import CatalogCache, PackManager, AlternativeManager
+
+
+class CatalogCacheTestCase(TestCase):
+    """class testing CatalogCache """
+
+    def setUp(self):
+        """setup tests"""
+        caches['stats'].clear()
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.db_pack_ind = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            )
+        self.db_pack_undisplayed = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='ROL',
+            brand='1637',
+            qt_paquet=30,
+            price=12,
+            display=False,
+            )
+        self.db_alternative_sp = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Ac',
+            type_activity='Sp',
+            activity='COURSE',
+            )
+        self.db_alternative_ecig = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Su',
+            substitut='ECIG',
+            nicotine=3,
+            display=False,
+            )
+
+    def test_catalog(self):
+        """test CatalogCache packs, alternatives and ecig ids"""
+        catalog = CatalogCache(self.usertest)
+        self.assertEqual(catalog.packs, [self.db_pack_ind])
+        self.assertEqual(catalog.alternatives, [self.db_alternative_sp, self.db_alternative_ecig])
+        self.assertEqual(catalog.displayed_alternatives, [self.db_alternative_sp])
+        self.assertEqual(catalog.ecig_ids, {self.db_alternative_ecig.id})
+
+    def test_catalog_cached(self):
+        """test catalog read from cache by next requests"""
+        with self.assertNumQueries(2):
+            CatalogCache(self.usertest).catalog
+        with self.assertNumQueries(0):
+            catalog = CatalogCache(self.usertest)
+            self.assertEqual(catalog.packs, [self.db_pack_ind])
+            self.assertEqual(len(catalog.alternatives), 2)
+
+    def test_create_pack_clears_catalog(self):
+        """test PackManager.create_pack invalidates user catalog"""
+        CatalogCache(self.usertest).catalog
+        datas = {'type_cig':'IND', 'brand':'LUCKY', 'qt_paquet':20, 'price':9}
+        newpack = PackManager(self.usertest, datas).create_pack()
+        self.assertEqual(CatalogCache(self.usertest).packs, [self.db_pack_ind, newpack])
+
+    def test_delete_pack_clears_catalog(self):
+        """test PackManager.delete_pack invalidates user catalog, pack used or not"""
+        CatalogCache(self.usertest).catalog
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=datetime.date(2020, 5, 13),
+            time_cig=datetime.time(13, 55),
+            paquet=self.db_pack_ind,
+        )
+        PackManager(self.usertest, {'id_pack': self.db_pack_ind.id}).delete_pack()
+        self.assertEqual(CatalogCache(self.usertest).packs, [])
+
+    def test_alternatives_clear_catalog(self):
+        """test AlternativeManager create and delete invalidate user catalog"""
+        CatalogCache(self.usertest).catalog
+        datas = {'type_alternative':'Su', 'substitut':'ECIG', 'nicotine': 6}
+        newalternative = AlternativeManager(self.usertest, datas).create_alternative()
+        self.assertEqual(
+            CatalogCache(self.usertest).ecig_ids,
+            {self.db_alternative_ecig.id, newalternative.id},
+            )
+        AlternativeManager(self.usertest, {'id_alternative': self.db_alternative_sp.id}).delete_alternative()
+        self.assertEqual(CatalogCache(self.usertest).displayed_alternatives, [newalternative])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""Module testing day_calendar module"""
+
+import datetime
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import ConsoCig
+from QuitSoonApp.modules import DayCalendar
+
+
+class DayCalendarTestCase(TestCase):
+    """class testing DayCalendar """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.othertest = User.objects.create_user(
+            'OtherUserTest', 'other@test.com', 'testpassword')
+        for user, day in [
+                (self.usertest, datetime.date(2020, 6, 1)),
+                (self.usertest, datetime.date(2020, 6, 1)),
+                (self.usertest, datetime.date(2020, 6, 3)),
+                (self.usertest, datetime.date(2020, 7, 3)),
+                (self.othertest, datetime.date(2020, 6, 2)),
+            ]:
+            ConsoCig.objects.create(
+                user=user,
+                date_cig=day,
+                time_cig=datetime.time(10, 15),
+                given=True,
+                )
+        self.start = datetime.date(2020, 6, 1)
+        self.lastday = datetime.date(2020, 6, 5)
+
+    def test_from_conso_one_query(self):
+        """test DayCalendar.from_conso loads user smoking days in one query"""
+        with self.assertNumQueries(1):
+            calendar = DayCalendar.from_conso(
+                ConsoCig.objects.filter(user=self.usertest), self.start, self.lastday)
+        self.assertEqual(len(calendar), 5)
+        self.assertEqual(calendar.bitmap, bytearray([1, 0, 1, 0, 0]))
+
+    def test_is_smoking_day(self):
+        """test DayCalendar.is_smoking_day method"""
+        calendar = DayCalendar(self.start, self.lastday, [datetime.date(2020, 6, 3)])
+        self.assertTrue(calendar.is_smoking_day(datetime.date(2020, 6, 3)))
+        self.assertFalse(datetime.date(2020, 6, 2) in calendar)
+        # days out of calendar
+        self.assertFalse(calendar.is_smoking_day(datetime.date(2020, 5, 31)))
+        self.assertFalse(calendar.is_smoking_day(datetime.date(2020, 7, 3)))
+
+    def test_counts_and_no_smoking_day(self):
+        """test DayCalendar counts and no_smoking_day list"""
+        calendar = DayCalendar(
+            self.start, self.lastday, [datetime.date(2020, 6, 1), datetime.date(2020, 6, 3)])
+        self.assertEqual(calendar.count_smoking_day, 2)
+        self.assertEqual(calendar.count_no_smoking_day, 3)
+        self.assertEqual(calendar.no_smoking_day, [
+            datetime.date(2020, 6, 2),
+            datetime.date(2020, 6, 4),
+            datetime.date(2020, 6, 5),
+            ])
+
+    def test_empty_period(self):
+        """test DayCalendar with lastday before date_start"""
+        calendar = DayCalendar(self.lastday, self.start)
+        self.assertEqual(len(calendar), 0)
+        self.assertEqual(calendar.no_smoking_day, [])
+
+    def test_streaks(self):
+        """test DayCalendar smoke free streaks"""
+        calendar = DayCalendar(
+            datetime.date(2020, 6, 1), datetime.date(2020, 6, 10),
+            [datetime.date(2020, 6, 3), datetime.date(2020, 6, 4), datetime.date(2020, 6, 8)])
+        self.assertEqual(calendar.streaks, [
+            (datetime.date(2020, 6, 1), datetime.date(2020, 6, 2), 2),
+            (datetime.date(2020, 6, 5), datetime.date(2020, 6, 7), 3),
+            (datetime.date(2020, 6, 9), datetime.date(2020, 6, 10), 2),
+            ])
+        self.assertEqual(calendar.longest_streak, 3)
+        self.assertEqual(calendar.current_streak, 2)
+
+    def test_streaks_smoking_lastday(self):
+        """test DayCalendar current streak is 0 if user smoked on lastday"""
+        calendar = DayCalendar(self.start, self.lastday, [self.lastday])
+        self.assertEqual(calendar.streaks, [(self.start, datetime.date(2020, 6, 4), 4)])
+        self.assertEqual(calendar.longest_streak, 4)
+        self.assertEqual(calendar.current_streak, 0)
+
+    def test_streaks_no_smoke_free_day(self):
+        """test DayCalendar streaks when user smoked each day or period is empty"""
+        calendar = DayCalendar(
+            self.start, datetime.date(2020, 6, 2),
+            [datetime.date(2020, 6, 1), datetime.date(2020, 6, 2)])
+        self.assertEqual(calendar.streaks, [])
+        self.assertEqual(calendar.longest_streak, 0)
+        self.assertEqual(calendar.current_streak, 0)
+        calendar = DayCalendar(self.lastday, self.start)
+        self.assertEqual(calendar.streaks, [])
+        self.assertEqual(calendar.current_streak, 0)
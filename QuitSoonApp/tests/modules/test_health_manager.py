@@ -149,3 +149,23 @@ class HealthManagerTestCase(TestCase):
         health.delete_conso_alternative()
         filter_conso = ConsoAlternative.objects.filter(user=self.usertest, id=92)
         self.assertFalse(filter_conso.exists())
+
+    def test_get_alternative_memoized(self):
+        """test HealthManager.get_alternative and get_conso_alternative resolved in one query with id_health"""
+        health = HealthManager(self.usertest, self.data_id)
+        with self.assertNumQueries(1):
+            self.assertEqual(health.get_alternative, self.alternative_sp)
+            self.assertEqual(health.get_conso_alternative, self.health_sp)
+            self.assertEqual(health.get_alternative, self.alternative_sp)
+
+    def test_create_conso_alternative_preloaded_alternative(self):
+        """test HealthManager.create_conso_alternative with an alternative already loaded by caller"""
+        health = HealthManager(self.usertest, self.data_su, self.alternative_su)
+        with self.assertNumQueries(0):
+            self.assertEqual(health.get_alternative, self.alternative_su)
+        new = health.create_conso_alternative()
+        self.assertEqual(new.alternative, self.alternative_su)
+        with self.assertNumQueries(0):
+            self.assertEqual(health.get_conso_alternative, new)
+        health.delete_conso_alternative()
+        self.assertEqual(health.get_conso_alternative, None)
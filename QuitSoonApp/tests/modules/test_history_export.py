@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""Module testing history_export module"""
+
+import datetime
+import json
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import Paquet, ConsoCig, Alternative, ConsoAlternative
+from QuitSoonApp.modules import HistoryExport
+
+
+class HistoryExportTestCase(TestCase):
+    """class testing HistoryExport """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.db_pack_ind = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            price_per_cig=0.5,
+            )
+        self.db_alternative_sp = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Ac',
+            type_activity='Sp',
+            activity='COURSE',
+            )
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=datetime.date(2020, 6, 17),
+            time_cig=datetime.time(10, 15),
+            paquet=self.db_pack_ind,
+            )
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=datetime.date(2020, 6, 18),
+            time_cig=datetime.time(11, 15),
+            given=True,
+            )
+        ConsoAlternative.objects.create(
+            user=self.usertest,
+            date_alter=datetime.date(2020, 6, 18),
+            time_alter=datetime.time(18, 0),
+            alternative=self.db_alternative_sp,
+            activity_duration=45,
+            )
+
+    def test_csv_lines(self):
+        """test HistoryExport.csv_lines method"""
+        lines = list(HistoryExport(self.usertest).lines('csv'))
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('action,date,time,given'))
+        self.assertTrue(lines[1].startswith('smoke,2020-06-17,10:15:00,False,IND,CAMEL,20,U,0.50'))
+        self.assertTrue(lines[2].startswith('smoke,2020-06-18,11:15:00,True,,'))
+        self.assertTrue(lines[3].startswith('health,2020-06-18,18:00:00,,,,,,,Ac,Sp,COURSE,,,45,'))
+
+    def test_ndjson_lines(self):
+        """test HistoryExport.ndjson_lines method"""
+        rows = [json.loads(line) for line in HistoryExport(self.usertest).lines('ndjson')]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['brand'], 'CAMEL')
+        self.assertEqual(rows[0]['date'], '2020-06-17')
+        self.assertEqual(rows[2]['activity_duration'], 45)
+
+    def test_date_range(self):
+        """test HistoryExport restricted to dates"""
+        export = HistoryExport(self.usertest, lastday=datetime.date(2020, 6, 17))
+        self.assertEqual(len(list(export.rows())), 1)
+        export = HistoryExport(self.usertest, date_start=datetime.date(2020, 6, 18))
+        self.assertEqual(len(list(export.rows())), 2)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+"""Module testing history_import module"""
+
+import csv
+import datetime
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import Paquet, ConsoCig, DailyLedger, UserProfile, TropheeProgress, Trophee
+from QuitSoonApp.modules import HistoryImport
+
+
+class HistoryImportTestCase(TestCase):
+    """class testing HistoryImport """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.db_pack_old = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=10,
+            price=5,
+            price_per_cig=0.5,
+            display=False,
+            )
+        self.db_pack_ind = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            price_per_cig=0.5,
+            )
+        self.db_pack_rol = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='ROL',
+            brand='1637',
+            qt_paquet=30,
+            price=12,
+            price_per_cig=0.32,
+            )
+        self.lines = [
+            'date,time,pack',
+            '2020-06-17,10:15,camel',
+            '17/06/2020,12:30,1637',
+            '2020-06-18,08:00,',
+            '',
+            ]
+
+    def test_run(self):
+        """test HistoryImport.run with valid rows"""
+        history = HistoryImport(self.usertest, self.lines, batch_size=2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(history.run(), 3)
+        inserts = [query for query in queries if query['sql'].startswith(
+            'INSERT INTO "{}"'.format(ConsoCig._meta.db_table))]
+        # 3 rows inserted by batches of 2
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(history.errors, [])
+        consos = ConsoCig.objects.filter(user=self.usertest).order_by('date_cig', 'time_cig')
+        self.assertEqual(consos.count(), 3)
+        self.assertEqual(consos[0].paquet, self.db_pack_ind)
+        self.assertEqual(consos[1].paquet, self.db_pack_rol)
+        self.assertEqual(consos[1].date_cig, datetime.date(2020, 6, 17))
+        self.assertTrue(consos[2].given)
+        self.assertEqual(DailyLedger.objects.get(date=datetime.date(2020, 6, 17)).nb_cig, 2)
+
+    def test_run_rebuilds_trophees(self):
+        """test HistoryImport.run recomputes user trophies progress from imported rows"""
+        UserProfile.objects.create(
+            user=self.usertest,
+            date_start=datetime.date(2020, 6, 15),
+            starting_nb_cig=5,
+            )
+        HistoryImport(self.usertest, self.lines).run()
+        progress = TropheeProgress.objects.get(user=self.usertest)
+        self.assertEqual(progress.nb_cig, 3)
+        self.assertEqual(progress.last_smoke_date, datetime.date(2020, 6, 18))
+        self.assertTrue(Trophee.objects.filter(user=self.usertest, nb_cig=0, nb_jour=2).exists())
+
+    def test_run_invalid_rows(self):
+        """test HistoryImport.run reports invalid rows and imports nothing"""
+        lines = self.lines + [
+            '2020-13-18,08:00,',
+            '2020-06-18,8h,',
+            '2020-06-18,08:00,MARLBORO',
+            '2020-06-18',
+            ]
+        history = HistoryImport(self.usertest, lines)
+        self.assertEqual(history.run(), 0)
+        self.assertEqual([line for line, error in history.errors], [6, 7, 8, 9])
+        self.assertTrue('MARLBORO' in history.errors[2][1])
+        self.assertFalse(ConsoCig.objects.exists())
+
+    def test_run_unreadable_file(self):
+        """test HistoryImport.run reports a csv error instead of raising it"""
+        lines = self.lines[:2] + ['2020-06-18,08:00,' + 'x' * (csv.field_size_limit() + 1)]
+        history = HistoryImport(self.usertest, lines)
+        self.assertEqual(history.run(), 0)
+        self.assertEqual(history.errors[0][0], 3)
+        self.assertFalse(ConsoCig.objects.exists())
+
+    def test_run_ambiguous_brand(self):
+        """test HistoryImport.run rejects a brand of several displayed packs"""
+        Paquet.objects.create(
+            user=self.usertest,
+            type_cig='ROL',
+            brand='CAMEL',
+            qt_paquet=30,
+            price=12,
+            price_per_cig=0.32,
+            )
+        history = HistoryImport(self.usertest, self.lines)
+        self.assertEqual(history.run(), 0)
+        self.assertEqual([line for line, error in history.errors], [2])
+        self.assertTrue('ambigu' in history.errors[0][1])
+
+    def test_import_history_command(self):
+        """test import_history management command"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('\n'.join(self.lines))
+        try:
+            call_command('import_history', 'NewUserTest', csv_file.name, stdout=open(os.devnull, 'w'))
+            self.assertEqual(ConsoCig.objects.count(), 3)
+            with open(csv_file.name, 'a') as invalid_file:
+                invalid_file.write('\nnodate,08:00,\n')
+            with self.assertRaises(CommandError):
+                call_command(
+                    'import_history', 'NewUserTest', csv_file.name,
+                    stdout=open(os.devnull, 'w'), stderr=open(os.devnull, 'w'))
+            self.assertEqual(ConsoCig.objects.count(), 3)
+        finally:
+            os.remove(csv_file.name)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+"""Module testing last_used_manager module"""
+
+import datetime
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import Paquet, ConsoCig, Alternative, ConsoAlternative, LastUsed
+from QuitSoonApp.modules import LastUsedManager, SmokeManager, HealthManager
+
+
+class LastUsedManagerTestCase(TestCase):
+    """class testing LastUsedManager """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.camel = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            )
+        self.rol = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='ROL',
+            brand='1637',
+            qt_paquet=30,
+            price=12,
+            )
+        self.course = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Ac',
+            type_activity='Sp',
+            activity='COURSE',
+            )
+        self.massage = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Ac',
+            type_activity='So',
+            activity='MASSAGE',
+            )
+        self.patch = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Su',
+            substitut='P24',
+            nicotine=2,
+            )
+
+    def smoke(self, pack_field, given=False):
+        return SmokeManager(self.usertest, {
+            'date_smoke': datetime.date(2020, 6, 1),
+            'time_smoke': datetime.time(10, 15),
+            'type_cig_field': 'IND' if pack_field == 'ind_pack_field' else 'ROL',
+            'ind_pack_field': self.camel.id,
+            'rol_pack_field': self.rol.id,
+            'given_field': given,
+            }).create_conso_cig()
+
+    def health(self, alternative):
+        field = {'Sp': 'sp_field', 'So': 'so_field'}.get(alternative.type_activity, 'su_field')
+        return HealthManager(self.usertest, {
+            'date_health': datetime.date(2020, 6, 1),
+            'time_health': datetime.time(10, 15),
+            'type_alternative_field': field[:2].capitalize(),
+            field: alternative.id,
+            'duration_hour': 0,
+            'duration_min': 30,
+            }).create_conso_alternative()
+
+    def test_smoke_pointers(self):
+        """test last pack updated on new smoke and repaired on delete"""
+        self.smoke('ind_pack_field')
+        last = self.smoke('rol_pack_field')
+        # given cigarettes don't change last pack
+        self.smoke('ind_pack_field', given=True)
+        self.assertEqual(LastUsed.objects.get(user=self.usertest).paquet, self.rol)
+        SmokeManager(self.usertest, {'id_smoke': last.id}).delete_conso_cig()
+        self.assertEqual(LastUsed.objects.get(user=self.usertest).paquet, self.camel)
+
+    def test_health_pointers(self):
+        """test last alternatives updated on new healthy action and repaired on delete"""
+        self.health(self.course)
+        self.health(self.patch)
+        last = self.health(self.massage)
+        last_used = LastUsed.objects.get(user=self.usertest)
+        self.assertEqual(last_used.alternative, self.massage)
+        self.assertEqual(last_used.alternative_sp, self.course)
+        self.assertEqual(last_used.alternative_so, self.massage)
+        self.assertEqual(last_used.alternative_su, self.patch)
+        self.assertIsNone(last_used.alternative_lo)
+        HealthManager(self.usertest, {'id_health': last.id}).delete_conso_alternative()
+        last_used = LastUsed.objects.get(user=self.usertest)
+        self.assertEqual(last_used.alternative, self.patch)
+        self.assertIsNone(last_used.alternative_so)
+        self.assertEqual(last_used.alternative_sp, self.course)
+
+    def test_rebuild(self):
+        """test pointers built from history when missing"""
+        for paquet in [self.rol, self.camel, None]:
+            ConsoCig.objects.create(
+                user=self.usertest,
+                date_cig=datetime.date(2020, 6, 1),
+                time_cig=datetime.time(10, 15),
+                paquet=paquet,
+                given=paquet is None,
+                )
+        ConsoAlternative.objects.create(
+            user=self.usertest,
+            date_alter=datetime.date(2020, 6, 1),
+            time_alter=datetime.time(10, 15),
+            alternative=self.patch,
+            )
+        last_used = LastUsedManager(self.usertest).last_used
+        self.assertEqual(last_used.paquet, self.camel)
+        self.assertEqual(last_used.alternative, self.patch)
+        self.assertEqual(last_used.alternative_su, self.patch)
+        self.assertIsNone(last_used.alternative_sp)
+        # then read in one query
+        with self.assertNumQueries(1):
+            last_used = LastUsedManager(self.usertest).last_used
+            self.assertEqual(last_used.paquet, self.camel)
+            self.assertEqual(last_used.alternative_su, self.patch)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+"""Module testing ledger_manager module"""
+
+from decimal import Decimal
+import datetime
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import (
+    UserProfile, Paquet, ConsoCig,
+    Alternative,
+    DailyLedger,
+)
+from QuitSoonApp.modules import LedgerManager, SmokeManager, HealthManager, StatsCache
+
+
+class LedgerManagerTestCase(TestCase):
+    """class testing LedgerManager """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.db_pack_ind = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            price_per_cig=Decimal('0.5'),
+            )
+        self.db_alternative_sp = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Ac',
+            type_activity='Sp',
+            activity='COURSE',
+            )
+        self.db_alternative_su = Alternative.objects.create(
+            user=self.usertest,
+            type_alternative='Su',
+            substitut='PAST',
+            nicotine=2,
+            )
+        self.day = datetime.date(2020, 6, 17)
+
+    def smoke(self, given=False):
+        datas = {
+            'date_smoke': self.day,
+            'time_smoke': datetime.time(13, 15),
+            'type_cig_field': 'IND',
+            'ind_pack_field': self.db_pack_ind.id,
+            'given_field': given,
+            }
+        smoke = SmokeManager(self.usertest, datas)
+        return smoke.create_conso_cig()
+
+    def health(self, alternative):
+        datas = {
+            'date_health': self.day,
+            'time_health': datetime.time(13, 15),
+            'type_alternative_field': 'Su' if alternative.type_alternative == 'Su' else 'Sp',
+            'sp_field': self.db_alternative_sp.id,
+            'su_field': self.db_alternative_su.id,
+            'duration_hour': 1,
+            'duration_min': 30,
+            }
+        health = HealthManager(self.usertest, datas)
+        return health.create_conso_alternative()
+
+    def test_create_conso_update_ledger(self):
+        """test creating consumption through managers updates the day ledger row"""
+        self.smoke()
+        self.smoke()
+        self.smoke(given=True)
+        self.health(self.db_alternative_sp)
+        self.health(self.db_alternative_su)
+        ledger = DailyLedger.objects.get(user=self.usertest, date=self.day)
+        self.assertEqual(ledger.nb_cig, 3)
+        self.assertEqual(ledger.nb_given, 1)
+        self.assertEqual(ledger.money_smoked, Decimal('1'))
+        self.assertEqual(ledger.activity_duration, 90)
+        self.assertEqual(ledger.nb_substitut, 1)
+
+    def test_delete_conso_update_ledger(self):
+        """test deleting consumption through managers updates the day ledger row"""
+        smoke = self.smoke()
+        self.smoke()
+        health = self.health(self.db_alternative_sp)
+        SmokeManager(self.usertest, {'id_smoke': smoke.id}).delete_conso_cig()
+        HealthManager(self.usertest, {'id_health': health.id}).delete_conso_alternative()
+        ledger = DailyLedger.objects.get(user=self.usertest, date=self.day)
+        self.assertEqual(ledger.nb_cig, 1)
+        self.assertEqual(ledger.money_smoked, Decimal('0.5'))
+        self.assertEqual(ledger.activity_duration, 0)
+
+    def test_rebuild(self):
+        """test LedgerManager.rebuild gives same rows than incremental updates"""
+        self.smoke()
+        self.smoke(given=True)
+        self.health(self.db_alternative_sp)
+        self.health(self.db_alternative_su)
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=datetime.date(2020, 6, 18),
+            time_cig=datetime.time(10, 15),
+            paquet=self.db_pack_ind,
+            )
+        incremental = list(DailyLedger.objects.filter(user=self.usertest).values(
+            'date', 'nb_cig', 'nb_given', 'money_smoked', 'activity_duration', 'nb_substitut'))
+        self.assertEqual(LedgerManager(self.usertest).rebuild(), 2)
+        rebuilt = list(DailyLedger.objects.filter(user=self.usertest).order_by('date').values(
+            'date', 'nb_cig', 'nb_given', 'money_smoked', 'activity_duration', 'nb_substitut'))
+        self.assertEqual(rebuilt[0], incremental[0])
+        self.assertEqual(rebuilt[1]['nb_cig'], 1)
+        self.assertEqual(rebuilt[1]['money_smoked'], Decimal('0.5'))
+
+    def test_totals(self):
+        """test LedgerManager.totals method"""
+        self.smoke()
+        self.health(self.db_alternative_sp)
+        totals = LedgerManager(self.usertest).totals(self.day, self.day)
+        self.assertEqual(totals['nb_cig'], 1)
+        self.assertEqual(totals['activity_duration'], 90)
+        totals = LedgerManager(self.usertest).totals(lastday=datetime.date(2020, 6, 1))
+        self.assertEqual(totals['nb_cig'], None)
+
+    def test_rebuild_ledger_command(self):
+        """test rebuild_ledger management command"""
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=self.day,
+            time_cig=datetime.time(10, 15),
+            paquet=self.db_pack_ind,
+            )
+        call_command('rebuild_ledger', verbosity=0)
+        ledger = DailyLedger.objects.get(user=self.usertest, date=self.day)
+        self.assertEqual(ledger.nb_cig, 1)
+
+    def test_rebuild_ledger_command_invalidates_stats(self):
+        """test rebuild_ledger command drops stats cached from the broken ledger"""
+        caches['stats'].clear()
+        UserProfile.objects.create(user=self.usertest, date_start=self.day, starting_nb_cig=10)
+        self.assertEqual(StatsCache(self.usertest).get_stats(self.day)['total_smoke'], 0)
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=self.day,
+            time_cig=datetime.time(10, 15),
+            paquet=self.db_pack_ind,
+            )
+        call_command('rebuild_ledger', verbosity=0)
+        self.assertEqual(StatsCache(self.usertest).get_stats(self.day)['total_smoke'], 1)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""Module testing nicotine_intake module"""
+
+import datetime
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import Paquet, ConsoCig, Alternative, ConsoAlternative
+from QuitSoonApp.modules import NicotineIntake
+
+
+class NicotineIntakeTestCase(TestCase):
+    """class testing NicotineIntake """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.start = datetime.date(2020, 6, 1)
+        self.lastday = datetime.date(2020, 6, 5)
+
+    def smoke(self, day, paquet=None, given=False):
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=day,
+            time_cig=datetime.time(10, 15),
+            paquet=paquet,
+            given=given,
+            )
+
+    def take(self, substitut, nicotine, day, time=datetime.time(8, 0), ecig_choice=None):
+        alternative, created = Alternative.objects.get_or_create(
+            user=self.usertest,
+            type_alternative='Su',
+            substitut=substitut,
+            nicotine=nicotine,
+            )
+        ConsoAlternative.objects.create(
+            user=self.usertest,
+            date_alter=day,
+            time_alter=time,
+            alternative=alternative,
+            ecig_choice=ecig_choice,
+            )
+
+    def test_smoke(self):
+        """test nicotine from cigarettes, with or without pack nicotine"""
+        paquet = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            nicotine=0.8,
+            )
+        self.smoke(datetime.date(2020, 6, 1), paquet)
+        self.smoke(datetime.date(2020, 6, 1), paquet)
+        self.smoke(datetime.date(2020, 6, 3), given=True)
+        # out of period
+        self.smoke(datetime.date(2020, 6, 6), paquet)
+        intake = NicotineIntake(self.usertest, self.start, self.lastday)
+        self.assertEqual(intake.smoke.tolist(), [1.6, 0, 1.0, 0, 0])
+        self.assertEqual(intake.substituts.tolist(), [0, 0, 0, 0, 0])
+
+    def test_patchs(self):
+        """test patches nicotine spread over their active window"""
+        # 16h patch at 16h: half on first day, half on next day
+        self.take('P16', 16, datetime.date(2020, 6, 1), datetime.time(16, 0))
+        # 24h patch at midnight: all on the same day
+        self.take('P24', 21, datetime.date(2020, 6, 3), datetime.time(0, 0))
+        # 24h patch the day before period start
+        self.take('P24', 24, datetime.date(2020, 5, 31), datetime.time(18, 0))
+        intake = NicotineIntake(self.usertest, self.start, self.lastday)
+        self.assertEqual(intake.substituts.tolist(), [26, 8, 21, 0, 0])
+
+    def test_other_substituts(self):
+        """test gums and lozenges nicotine counted on the day they're taken"""
+        self.take('GM', 2, datetime.date(2020, 6, 2))
+        self.take('GM', 2, datetime.date(2020, 6, 2))
+        self.take('PAST', 1.5, datetime.date(2020, 6, 5))
+        intake = NicotineIntake(self.usertest, self.start, self.lastday)
+        self.assertEqual(intake.substituts.tolist(), [0, 4, 0, 0, 1.5])
+
+    def test_ecig(self):
+        """test e-cig bottles nicotine spread between bottle starts"""
+        # 10ml at 6mg/ml started before period, used 4 days until 2020-06-02
+        self.take('ECIG', 6, datetime.date(2020, 5, 29), ecig_choice='S')
+        self.take('ECIG', 6, datetime.date(2020, 5, 31), ecig_choice='V')
+        # next bottle lasting 4 days too (average of previous ones)
+        self.take('ECIG', 3, datetime.date(2020, 6, 2), ecig_choice='VS')
+        intake = NicotineIntake(self.usertest, self.start, self.lastday)
+        self.assertEqual(intake.substituts.tolist(), [15, 7.5, 7.5, 7.5, 7.5])
+
+    def test_ecig_first_bottle(self):
+        """test first e-cig bottle spread until lastday"""
+        self.take('ECIG', 8, datetime.date(2020, 6, 2), ecig_choice='S')
+        intake = NicotineIntake(self.usertest, self.start, self.lastday)
+        self.assertEqual(intake.substituts.tolist(), [0, 20, 20, 20, 20])
+
+    def test_per_day_queries(self):
+        """test whole period is computed from one fetch per table"""
+        self.smoke(datetime.date(2020, 6, 1), given=True)
+        self.take('GM', 2, datetime.date(2020, 6, 2))
+        intake = NicotineIntake(self.usertest, self.start, self.lastday)
+        with self.assertNumQueries(2):
+            self.assertEqual(intake.per_day.tolist(), [1, 2, 0, 0, 0])
+            self.assertAlmostEqual(intake.average_per_day, 0.6)
+            self.assertEqual(intake.rows[1], (datetime.date(2020, 6, 2), 0, 2))
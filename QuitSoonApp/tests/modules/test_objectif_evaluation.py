@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""Module testing objectif_evaluation module"""
+
+import datetime
+import os
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils.timezone import make_aware
+
+from QuitSoonApp.models import ConsoCig, Objectif
+from QuitSoonApp.modules import ObjectifEvaluation
+
+
+class ObjectifEvaluationTestCase(TestCase):
+    """class testing ObjectifEvaluation """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.othertest = User.objects.create_user(
+            'OtherUserTest', 'other@test.com', 'testpassword')
+        for user, day, hour in [
+                (self.usertest, datetime.date(2020, 6, 1), 9),
+                (self.usertest, datetime.date(2020, 6, 1), 12),
+                (self.usertest, datetime.date(2020, 6, 2), 10),
+                (self.usertest, datetime.date(2020, 6, 3), 18),
+                (self.othertest, datetime.date(2020, 6, 2), 10),
+            ]:
+            ConsoCig.objects.create(
+                user=user,
+                date_cig=day,
+                time_cig=datetime.time(hour, 0),
+                given=True,
+                )
+        self.now = make_aware(datetime.datetime(2020, 6, 5, 12, 0))
+
+    def objectif(self, user, qt, start, end):
+        return Objectif.objects.create(
+            user=user,
+            qt=qt,
+            datetime_creation=make_aware(start),
+            datetime_objectif=make_aware(end),
+            )
+
+    def test_count_smoke(self):
+        """test cigarettes counted in each objective window in one query"""
+        first = self.objectif(
+            self.usertest, 1,
+            datetime.datetime(2020, 6, 1, 10, 0), datetime.datetime(2020, 6, 3, 18, 0))
+        second = self.objectif(
+            self.usertest, 2,
+            datetime.datetime(2020, 6, 3, 19, 0), datetime.datetime(2020, 6, 4, 0, 0))
+        other = self.objectif(
+            self.othertest, 3,
+            datetime.datetime(2020, 6, 1, 0, 0), datetime.datetime(2020, 6, 3, 0, 0))
+        # not ended yet
+        self.objectif(
+            self.othertest, 4,
+            datetime.datetime(2020, 6, 1, 0, 0), datetime.datetime(2020, 6, 6, 0, 0))
+        with self.assertNumQueries(1):
+            nb_cig = ObjectifEvaluation(self.now).count_smoke()
+        self.assertEqual(nb_cig, {first.id: 3, other.id: 1})
+        self.assertNotIn(second.id, nb_cig)
+
+    def test_evaluate(self):
+        """test due objectives closed and respected set in bulk"""
+        failed = self.objectif(
+            self.usertest, 1,
+            datetime.datetime(2020, 6, 1, 10, 0), datetime.datetime(2020, 6, 3, 18, 0))
+        respected = self.objectif(
+            self.othertest, 2,
+            datetime.datetime(2020, 6, 1, 0, 0), datetime.datetime(2020, 6, 3, 0, 0))
+        no_smoke = self.objectif(
+            self.othertest, 3,
+            datetime.datetime(2020, 6, 4, 0, 0), datetime.datetime(2020, 6, 5, 0, 0))
+        running = self.objectif(
+            self.usertest, 4,
+            datetime.datetime(2020, 6, 4, 0, 0), datetime.datetime(2020, 6, 6, 0, 0))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(ObjectifEvaluation(self.now).evaluate(), 3)
+        # select due objectives, count cigarettes, update (savepoints excluded)
+        self.assertEqual(len([
+            query for query in queries if 'SAVEPOINT' not in query['sql']]), 3)
+        self.assertEqual(
+            {obj.id: (obj.closed, obj.respected) for obj in Objectif.objects.all()},
+            {
+                failed.id: (True, False),
+                respected.id: (True, True),
+                no_smoke.id: (True, True),
+                running.id: (False, False),
+            })
+        # already closed objectives are not evaluated again
+        self.assertEqual(ObjectifEvaluation(self.now).evaluate(), 0)
+
+    def test_evaluate_objectifs_command(self):
+        """test evaluate_objectifs command"""
+        self.objectif(
+            self.usertest, 1,
+            datetime.datetime(2020, 6, 1, 10, 0), datetime.datetime(2020, 6, 2, 0, 0))
+        call_command('evaluate_objectifs', stdout=open(os.devnull, 'w'))
+        objectif = Objectif.objects.get(user=self.usertest)
+        self.assertTrue(objectif.closed)
+        self.assertTrue(objectif.respected)
@@ -5,10 +5,12 @@
 from decimal import Decimal
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.test import TestCase
 from django.contrib.auth.models import User
 
-from QuitSoonApp.models import Paquet, ConsoCig
+from QuitSoonApp.models import UserProfile, Paquet, ConsoCig
 from QuitSoonApp.modules import PackManager
 
 
@@ -254,3 +256,92 @@ class PackManagerTestCase(TestCase):
         )
         self.assertEqual(find_pack.g_per_cig, Decimal('0.6'))
         self.assertEqual(find_pack.price_per_cig, Decimal('0.22'))
+
+    def test_update_ref_price_per_cig(self):
+        """test PackManager keeps UserProfile.ref_price_per_cig on user first pack"""
+        UserProfile.objects.create(
+            user=self.usertest,
+            date_start=datetime.date(2020, 6, 1),
+            starting_nb_cig=20
+        )
+        PackManager(self.usertest, {
+            'type_cig':'IND',
+            'brand':'CAMEL',
+            'qt_paquet':20,
+            'price':10,
+            }).create_pack()
+        self.assertEqual(UserProfile.objects.get(user=self.usertest).ref_price_per_cig, Decimal('0.5'))
+        PackManager(self.usertest, {
+            'type_cig':'ROL',
+            'brand':'TABACO',
+            'qt_paquet':40,
+            'price':16,
+            }).create_pack()
+        self.assertEqual(UserProfile.objects.get(user=self.usertest).ref_price_per_cig, Decimal('0.5'))
+        first_pack = Paquet.objects.get(brand='CAMEL')
+        PackManager(self.usertest, {'id_pack': first_pack.id}).delete_pack()
+        self.assertEqual(UserProfile.objects.get(user=self.usertest).ref_price_per_cig, Decimal('0.32'))
+
+    def test_create_pack_upsert(self):
+        """test PackManager.create_pack displays again a hidden pack, in one INSERT"""
+        db_pack = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            price_per_cig=0.5,
+            display=False,
+            )
+        datas = {
+            'type_cig':'IND',
+            'brand':'CAMEL',
+            'qt_paquet':20,
+            'price':10,
+            }
+        with self.assertNumQueries(1):
+            newpack = PackManager(self.usertest, datas).upsert_pack()
+        PackManager(self.usertest, datas).create_pack()
+        self.assertEqual(newpack.id, db_pack.id)
+        self.assertTrue(newpack.display)
+        self.assertEqual(Paquet.objects.filter(user=self.usertest).count(), 1)
+        self.assertTrue(Paquet.objects.get(id=db_pack.id).display)
+
+    def test_delete_used_pack_one_update(self):
+        """test PackManager.delete_pack hides a smoked pack in one UPDATE, row locked first"""
+        db_pack = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            )
+        ConsoCig.objects.create(
+            user=self.usertest,
+            date_cig=datetime.date(2020, 5, 13),
+            time_cig=datetime.time(13, 55),
+            paquet=db_pack,
+        )
+        pack = PackManager(self.usertest, {'id_pack': db_pack.id})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(pack.delete_pack())
+        statements = [query['sql'].split()[0] for query in queries
+                      if '"{}"'.format(Paquet._meta.db_table) in query['sql']]
+        # row locked, then hidden in one UPDATE, before reference price lookup
+        self.assertEqual(statements[:2], ['SELECT', 'UPDATE'])
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertFalse('DELETE' in statements)
+        self.assertFalse(Paquet.objects.get(id=db_pack.id).display)
+
+    def test_delete_pack_of_other_user(self):
+        """test PackManager.delete_pack ignores packs of other users"""
+        other_user = User.objects.create_user('OtherUser', 'other@test.com', 'testpassword')
+        db_pack = Paquet.objects.create(
+            user=other_user,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            )
+        self.assertFalse(PackManager(self.usertest, {'id_pack': db_pack.id}).delete_pack())
+        self.assertTrue(Paquet.objects.filter(id=db_pack.id, display=True).exists())
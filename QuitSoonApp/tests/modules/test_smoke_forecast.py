@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""Module testing smoke_forecast module"""
+
+import datetime
+
+import numpy as np
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import UserProfile, ConsoCig
+from QuitSoonApp.modules import SmokeForecast, SmokeManager, LedgerManager
+
+
+class SmokeForecastTestCase(TestCase):
+    """class testing SmokeForecast """
+
+    def setUp(self):
+        """setup tests"""
+        caches['stats'].clear()
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        self.start = datetime.date(2020, 6, 1)
+        UserProfile.objects.create(
+            user=self.usertest,
+            date_start=self.start,
+            starting_nb_cig=10,
+            )
+
+    def test_linear(self):
+        """test linear trend, zero date and forecast"""
+        forecast = SmokeForecast(self.start, datetime.date(2020, 6, 10), range(10, 0, -1))
+        a, b, sigma = forecast.fits['linear'].solve()
+        self.assertAlmostEqual(a, 10)
+        self.assertAlmostEqual(b, -1)
+        self.assertAlmostEqual(sigma, 0, places=5)
+        zero = datetime.date(2020, 6, 11)
+        self.assertEqual(forecast.zero_date(), (zero, zero, zero))
+        self.assertEqual(
+            [round(point['nb_cig'], 6) for point in forecast.forecast(3)], [0, 0, 0])
+
+    def test_confidence_band(self):
+        """test zero date band around trend with noisy counts"""
+        forecast = SmokeForecast(
+            self.start, datetime.date(2020, 6, 10), [10, 11, 8, 8, 7, 6, 4, 4, 3, 1])
+        zero, earliest, latest = forecast.zero_date()
+        self.assertTrue(earliest < zero < latest)
+        points = forecast.forecast(2)
+        self.assertEqual(points[0]['date'], datetime.date(2020, 6, 11))
+        self.assertTrue(points[0]['low'] <= points[0]['nb_cig'] <= points[0]['high'])
+
+    def test_exponential(self):
+        """test exponential decay trend"""
+        forecast = SmokeForecast(self.start, datetime.date(2020, 6, 5), [16, 8, 4, 2, 1])
+        a, b, sigma = forecast.fits['exponential'].solve()
+        self.assertAlmostEqual(np.exp(a), 16)
+        self.assertAlmostEqual(np.exp(b), 0.5)
+        self.assertEqual(forecast.zero_date('exponential')[0], datetime.date(2020, 6, 6))
+        self.assertAlmostEqual(forecast.forecast(1, 'exponential')[0]['nb_cig'], 0.5)
+
+    def test_no_trend(self):
+        """test no forecast without at least 2 days"""
+        forecast = SmokeForecast(self.start, self.start, [3])
+        self.assertIsNone(forecast.zero_date())
+        self.assertEqual(forecast.forecast(3), [])
+
+    def test_no_decrease(self):
+        """test no zero date when trend does not decrease, zero from start without cigarettes"""
+        forecast = SmokeForecast(self.start, datetime.date(2020, 6, 4), [4, 4, 5, 5])
+        self.assertEqual(forecast.zero_date(), (None, None, None))
+        forecast = SmokeForecast(self.start, datetime.date(2020, 6, 4), [0, 0, 0, 0])
+        self.assertEqual(forecast.zero_date(), (self.start, self.start, self.start))
+
+    def test_extend(self):
+        """test extending with smoke free days gives same fit as fitting from scratch"""
+        forecast = SmokeForecast(self.start, datetime.date(2020, 6, 6), [5, 0, 7, 3, 0, 2])
+        forecast.extend(datetime.date(2020, 6, 8))
+        expected = SmokeForecast(
+            self.start, datetime.date(2020, 6, 8), [5, 0, 7, 3, 0, 2, 0, 0])
+        self.assertEqual(forecast.counts.tolist(), expected.counts.tolist())
+        self.assertEqual(forecast.lastday, expected.lastday)
+        for model in SmokeForecast.MODELS:
+            np.testing.assert_allclose(
+                forecast.fits[model].solve(), expected.fits[model].solve(), atol=1e-9)
+
+    def test_get_cached(self):
+        """test forecast fitted once from ledger, fitted again after a new cigarette"""
+        for day in [1, 1, 2]:
+            ConsoCig.objects.create(
+                user=self.usertest,
+                date_cig=datetime.date(2020, 6, day),
+                time_cig=datetime.time(10, 15),
+                given=True,
+                )
+        LedgerManager(self.usertest).rebuild()
+        lastday = datetime.date(2020, 6, 3)
+        with self.assertNumQueries(2):
+            forecast = SmokeForecast.get(self.usertest, lastday)
+        self.assertEqual(forecast.counts.tolist(), [2, 1, 0])
+        with self.assertNumQueries(0):
+            SmokeForecast.get(self.usertest, lastday)
+        SmokeManager(self.usertest, {
+            'date_smoke': lastday,
+            'time_smoke': datetime.time(10, 15),
+            'given_field': True,
+            }).create_conso_cig()
+        with self.assertNumQueries(2):
+            forecast = SmokeForecast.get(self.usertest, datetime.date(2020, 6, 4))
+        self.assertEqual(forecast.counts.tolist(), [2, 1, 1, 0])
+
+    def test_get_stale_write(self):
+        """test a fit written back after a concurrent new cigarette is never read"""
+        lastday = datetime.date(2020, 6, 3)
+        key = SmokeForecast.cache_key(self.usertest)
+        stale = SmokeForecast.get(self.usertest, lastday)
+        SmokeManager(self.usertest, {
+            'date_smoke': lastday,
+            'time_smoke': datetime.time(10, 15),
+            'given_field': True,
+            }).create_conso_cig()
+        caches['stats'].set(key, stale)
+        self.assertEqual(SmokeForecast.get(self.usertest, lastday).counts.tolist(), [0, 0, 1])
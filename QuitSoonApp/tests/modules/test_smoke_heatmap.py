@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+"""Module testing smoke_heatmap module"""
+
+import datetime
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import ConsoCig
+from QuitSoonApp.modules import SmokeHeatmap
+
+
+class SmokeHeatmapTestCase(TestCase):
+    """class testing SmokeHeatmap """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        other = User.objects.create_user(
+            'OtherUserTest', 'other@test.com', 'testpassword')
+        for user, day, time in [
+                # monday
+                (self.usertest, datetime.date(2020, 6, 15), datetime.time(8, 15)),
+                (self.usertest, datetime.date(2020, 6, 15), datetime.time(8, 45)),
+                (self.usertest, datetime.date(2020, 6, 22), datetime.time(8, 5)),
+                # sunday
+                (self.usertest, datetime.date(2020, 6, 21), datetime.time(23, 59)),
+                # saturday
+                (self.usertest, datetime.date(2020, 6, 20), datetime.time(0, 0)),
+                (other, datetime.date(2020, 6, 15), datetime.time(8, 15)),
+            ]:
+            ConsoCig.objects.create(user=user, date_cig=day, time_cig=time, given=True)
+
+    def test_matrix(self):
+        """test SmokeHeatmap.matrix with one query"""
+        heatmap = SmokeHeatmap(self.usertest)
+        with self.assertNumQueries(1):
+            matrix = heatmap.matrix
+        self.assertEqual(matrix.shape, (7, 24))
+        self.assertEqual(matrix.sum(), 5)
+        self.assertEqual(matrix[0][8], 3)
+        self.assertEqual(matrix[6][23], 1)
+        self.assertEqual(matrix[5][0], 1)
+
+    def test_matrix_date_window(self):
+        """test SmokeHeatmap.matrix restricted to dates"""
+        heatmap = SmokeHeatmap(
+            self.usertest, datetime.date(2020, 6, 16), datetime.date(2020, 6, 21))
+        self.assertEqual(heatmap.matrix.sum(), 2)
+        self.assertEqual(heatmap.matrix[0][8], 0)
+
+    def test_matrix_no_conso(self):
+        """test SmokeHeatmap.matrix without cigarettes"""
+        heatmap = SmokeHeatmap(self.usertest, lastday=datetime.date(2020, 1, 1))
+        self.assertEqual(heatmap.matrix.sum(), 0)
+        self.assertEqual(heatmap.rows[0], ('Lundi', [0] * 24))
@@ -4,10 +4,12 @@
 
 import datetime
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 
-from QuitSoonApp.models import Paquet, ConsoCig
+from QuitSoonApp.models import Paquet, ConsoCig, DailyLedger, LastUsed
 from QuitSoonApp.modules import SmokeManager
 
 
@@ -167,3 +169,97 @@ class SmokeManagerTestCase(TestCase):
         smoke.delete_conso_cig()
         filter_conso = ConsoCig.objects.filter(user=self.usertest, id=db_smoke_given.id)
         self.assertFalse(filter_conso.exists())
+
+    def test_get_pack_memoized(self):
+        """test SmokeManager.get_pack and get_conso_cig resolved in one query with id_smoke"""
+        smoke = SmokeManager(self.usertest, self.old_smoke_ind_data)
+        with self.assertNumQueries(1):
+            self.assertEqual(smoke.get_pack, self.db_pack_ind)
+            self.assertEqual(smoke.get_conso_cig, self.db_smoke_ind)
+            self.assertEqual(smoke.get_pack, self.db_pack_ind)
+
+    def test_create_conso_cig_preloaded_pack(self):
+        """test SmokeManager.create_conso_cig with a pack already loaded by caller"""
+        smoke = SmokeManager(self.usertest, self.new_datas_ind, self.db_pack_ind)
+        with CaptureQueriesContext(connection) as queries:
+            newconso = smoke.create_conso_cig()
+        self.assertEqual(newconso.paquet, self.db_pack_ind)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'FROM "QuitSoonApp_paquet"' in query['sql']
+            ])
+        with self.assertNumQueries(0):
+            self.assertEqual(smoke.get_conso_cig, newconso)
+        smoke.delete_conso_cig()
+        self.assertEqual(smoke.get_conso_cig, None)
+
+    def test_spread_times(self):
+        """test SmokeManager.spread_times over waking hours, until time_smoke on last day"""
+        self.new_datas_ind['time_smoke'] = datetime.time(14, 0)
+        smoke = SmokeManager(self.usertest, self.new_datas_ind)
+        self.assertEqual(
+            smoke.spread_times(datetime.date(2020, 5, 17), 3),
+            [datetime.time(10, 0), datetime.time(12, 0), datetime.time(14, 0)],
+            )
+        self.assertEqual(
+            smoke.spread_times(datetime.date(2020, 5, 16), 2),
+            [datetime.time(15, 30), datetime.time(23, 0)],
+            )
+        self.new_datas_ind['time_smoke'] = datetime.time(1, 0)
+        smoke = SmokeManager(self.usertest, self.new_datas_ind)
+        self.assertEqual(
+            smoke.spread_times(datetime.date(2020, 5, 17), 2),
+            [datetime.time(0, 30), datetime.time(1, 0)],
+            )
+        self.new_datas_ind['time_smoke'] = datetime.time(0, 0)
+        smoke = SmokeManager(self.usertest, self.new_datas_ind)
+        self.assertEqual(
+            smoke.spread_times(datetime.date(2020, 5, 17), 2),
+            [datetime.time(15, 30), datetime.time(23, 0)],
+            )
+
+    def test_is_bulk(self):
+        """test SmokeManager.is_bulk with a count or a date range"""
+        self.assertFalse(SmokeManager(self.usertest, self.new_datas_ind).is_bulk)
+        self.assertFalse(SmokeManager(self.usertest, self.old_smoke_ind_data).is_bulk)
+        self.new_datas_ind['nb_cig'] = 6
+        self.assertTrue(SmokeManager(self.usertest, self.new_datas_ind).is_bulk)
+        self.new_datas_ind['nb_cig'] = None
+        self.new_datas_ind['date_end'] = datetime.date(2020, 5, 20)
+        self.assertTrue(SmokeManager(self.usertest, self.new_datas_ind).is_bulk)
+
+    def test_create_bulk_conso_cig(self):
+        """test SmokeManager.create_bulk_conso_cig on a date range, in one INSERT"""
+        self.new_datas_ind['nb_cig'] = 12
+        self.new_datas_ind['date_end'] = datetime.date(2020, 5, 23)
+        smoke = SmokeManager(self.usertest, self.new_datas_ind, self.db_pack_ind)
+        with CaptureQueriesContext(connection) as queries:
+            consos = smoke.create_bulk_conso_cig()
+        self.assertEqual(len(consos), 7 * 12)
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "QuitSoonApp_consocig"')
+            ]), 1)
+        self.assertEqual(ConsoCig.objects.filter(
+            user=self.usertest, date_cig__range=(datetime.date(2020, 5, 17), datetime.date(2020, 5, 23)),
+            paquet=self.db_pack_ind).count(), 7 * 12)
+        self.assertEqual(
+            list(DailyLedger.objects.filter(user=self.usertest).values_list('nb_cig', flat=True)),
+            [12] * 7,
+            )
+        self.assertEqual(LastUsed.objects.get(user=self.usertest).paquet, self.db_pack_ind)
+
+    def test_create_bulk_conso_cig_counts(self):
+        """test SmokeManager.create_bulk_conso_cig with per day counts"""
+        self.new_datas_ind['given_field'] = True
+        smoke = SmokeManager(self.usertest, self.new_datas_ind)
+        consos = smoke.create_bulk_conso_cig({
+            datetime.date(2020, 5, 15): 3,
+            datetime.date(2020, 5, 16): 0,
+            datetime.date(2020, 5, 17): 2,
+            })
+        self.assertEqual(len(consos), 5)
+        self.assertTrue(all(conso.given and conso.paquet is None for conso in consos))
+        ledger = dict(DailyLedger.objects.filter(user=self.usertest).values_list('date', 'nb_given'))
+        self.assertEqual(ledger, {datetime.date(2020, 5, 15): 3, datetime.date(2020, 5, 17): 2})
+        self.assertEqual(smoke.create_bulk_conso_cig({datetime.date(2020, 5, 18): 0}), [])
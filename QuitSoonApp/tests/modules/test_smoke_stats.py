@@ -2,13 +2,14 @@
 
 """Module testing smoke_stats module"""
 
+from decimal import Decimal
 import datetime
 
 from django.test import TestCase
 from django.contrib.auth.models import User
 
 from QuitSoonApp.models import UserProfile, Paquet, ConsoCig
-from QuitSoonApp.modules import SmokeStats
+from QuitSoonApp.modules import SmokeStats, LedgerManager, PackManager
 
 from ..MOCK_DATA import (
     Create_test_packs, row_paquet_data,
@@ -29,8 +30,10 @@ class SmokeStatsTestCase(TestCase):
         )
         self.packs = Create_test_packs(self.user, row_paquet_data)
         self.packs.populate_test_db()
+        PackManager.update_ref_price_per_cig(self.user)
         self.smoke = Create_test_smoke(self.user, row_conso_cig_data)
         self.smoke.populate_test_db()
+        LedgerManager(self.user).rebuild()
         self.stat = SmokeStats(self.user, datetime.date(2019, 11, 28))
 
     def test_get_missing_datas_smoke(self):
@@ -65,3 +68,148 @@ class SmokeStatsTestCase(TestCase):
         print(self.stat.total_money_with_starting_nb_cig)
         print(self.stat.money_saved)
         # self.assertEqual(stat.average_per_day, 200)
+
+    def test_streaks(self):
+        self.assertEqual(self.stat.streaks, [
+            (datetime.date(2019, 11, 22), datetime.date(2019, 11, 22), 1),
+            (datetime.date(2019, 11, 24), datetime.date(2019, 11, 24), 1),
+            (datetime.date(2019, 11, 26), datetime.date(2019, 11, 28), 3),
+            ])
+        self.assertEqual(self.stat.current_streak, 3)
+        self.assertEqual(self.stat.longest_streak, 3)
+
+    def test_histogram(self):
+        self.assertEqual(len(self.stat.histogram), 57)
+        self.assertEqual(self.stat.histogram[datetime.date(2019, 9, 28)][0], 12)
+
+    def test_money_smoked_breakdowns(self):
+        per_day = self.stat.money_smoked_per_day
+        per_pack = self.stat.money_smoked_per_pack
+        self.assertEqual(len(per_day), 57)
+        total = round(self.stat.total_money_smoked, 2)
+        self.assertEqual(round(sum(per_day.values()), 2), total)
+        self.assertEqual(round(sum(per_pack.values()), 2), total)
+
+    def test_money_smoked_ignore_given_cig(self):
+        pack = Paquet.objects.filter(user=self.user)[0]
+        ConsoCig.objects.create(
+            user=self.user,
+            date_cig=datetime.date(2019, 11, 28),
+            time_cig=datetime.time(10, 15),
+            paquet=pack,
+            given=True,
+            )
+        LedgerManager(self.user).rebuild()
+        stat = SmokeStats(self.user, datetime.date(2019, 11, 28))
+        self.assertEqual(stat.nb_per_day(datetime.date(2019, 11, 28)), 1)
+        self.assertEqual(stat.money_smoked_per_day[datetime.date(2019, 11, 28)], 0)
+        self.assertEqual(stat.total_money_smoked, self.stat.total_money_smoked)
+        self.assertEqual(stat.money_smoked_per_pack, self.stat.money_smoked_per_pack)
+
+    def test_money_saved(self):
+        ref_price_per_cig = Paquet.objects.filter(user=self.user).order_by('id')[0].price_per_cig
+        self.assertEqual(self.stat.total_money_with_starting_nb_cig, 62 * 20 * ref_price_per_cig)
+        self.assertEqual(
+            self.stat.money_saved,
+            self.stat.total_money_with_starting_nb_cig - self.stat.total_money_smoked)
+
+    def test_money_saved_no_pack(self):
+        UserProfile.objects.filter(user=self.user).update(ref_price_per_cig=None)
+        stat = SmokeStats(self.user, datetime.date(2019, 11, 28))
+        self.assertEqual(stat.total_money_with_starting_nb_cig, 0)
+
+    def test_all_stats_in_constant_queries(self):
+        # profile and histogram
+        with self.assertNumQueries(2):
+            stat = SmokeStats(self.user, datetime.date(2019, 11, 28))
+            stat.total_smoke
+            stat.average_per_day
+            stat.count_smoking_day
+            stat.count_no_smoking_day
+            stat.no_smoking_day
+            stat.nb_per_day("2019-09-28")
+            stat.total_money_smoked
+            stat.money_saved
+            stat.money_saved
+
+
+class SmokeStatsSeveralUsersTestCase(TestCase):
+    """class testing SmokeStats only count user own consumption"""
+
+    def setUp(self):
+        """setup tests"""
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(
+                'NewUserTest{}'.format(i), 'test{}@test.com'.format(i), 'testpassword')
+            UserProfile.objects.create(
+                user=user,
+                date_start="2020-06-01",
+                starting_nb_cig=20
+            )
+            # user i smokes during i+1 different days, twice a day
+            for day in range(i + 1):
+                for hour in (10, 18):
+                    ConsoCig.objects.create(
+                        user=user,
+                        date_cig=datetime.date(2020, 6, 1 + day),
+                        time_cig=datetime.time(hour, 0),
+                        given=True,
+                        )
+            LedgerManager(user).rebuild()
+            self.users.append(user)
+
+    def test_count_smoking_day_per_user(self):
+        for i, user in enumerate(self.users):
+            stat = SmokeStats(user, datetime.date(2020, 6, 10))
+            self.assertEqual(stat.count_smoking_day, i + 1)
+            self.assertEqual(stat.count_no_smoking_day, 10 - (i + 1))
+            self.assertEqual(stat.total_smoke, 2 * (i + 1))
+
+    def test_money_saved_per_user(self):
+        for i, user in enumerate(self.users):
+            PackManager(user, {
+                'type_cig': 'IND',
+                'brand': 'CAMEL',
+                'qt_paquet': 20,
+                'price': 10 * (i + 1),
+                }).create_pack()
+        for i, user in enumerate(self.users):
+            stat = SmokeStats(user, datetime.date(2020, 6, 10))
+            stat.histogram
+            with self.assertNumQueries(0):
+                # given cigarettes cost nothing
+                self.assertEqual(stat.money_saved, 10 * 20 * Decimal('0.5') * (i + 1))
+
+
+class SmokeStatsWindowTestCase(TestCase):
+    """class testing SmokeStats ignore consumption after lastday"""
+
+    def setUp(self):
+        """setup tests"""
+        self.user = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        UserProfile.objects.create(
+            user=self.user,
+            date_start="2020-06-01",
+            starting_nb_cig=20
+        )
+        for day in (2, 3, 20):
+            ConsoCig.objects.create(
+                user=self.user,
+                date_cig=datetime.date(2020, 6, day),
+                time_cig=datetime.time(10, 0),
+                given=True,
+                )
+        LedgerManager(self.user).rebuild()
+        self.stat = SmokeStats(self.user, datetime.date(2020, 6, 5))
+
+    def test_total_smoke_until_lastday(self):
+        self.assertEqual(self.stat.total_smoke, 2)
+        self.assertEqual(self.stat.average_per_day, 0.4)
+        self.assertEqual(self.stat.nb_per_day(datetime.date(2020, 6, 20)), 0)
+
+    def test_count_smoking_day_until_lastday(self):
+        self.assertEqual(self.stat.count_smoking_day, 2)
+        self.assertEqual(self.stat.count_no_smoking_day, 3)
+        self.assertEqual(len(self.stat.no_smoking_day), 3)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+"""Module testing stats_cache module"""
+
+import datetime
+import os
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.core.management import call_command, CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import UserProfile, Paquet
+from QuitSoonApp.modules import StatsCache, SmokeManager, ResetProfile
+
+
+def shared_stats_cache():
+    """stats cache settings of a file cache in a temporary directory, shared with workers"""
+    return {
+        'stats': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tempfile.mkdtemp(),
+        },
+    }
+
+
+class StatsCacheTestCase(TestCase):
+    """class testing StatsCache """
+
+    def setUp(self):
+        """setup tests"""
+        caches['stats'].clear()
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        UserProfile.objects.create(
+            user=self.usertest,
+            date_start=datetime.date(2020, 6, 1),
+            starting_nb_cig=20
+        )
+        self.db_pack_ind = Paquet.objects.create(
+            user=self.usertest,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            price_per_cig=0.5,
+            )
+        self.lastday = datetime.date(2020, 6, 10)
+        self.smoke_datas = {
+            'date_smoke': datetime.date(2020, 6, 5),
+            'time_smoke': datetime.time(13, 15),
+            'type_cig_field': 'IND',
+            'ind_pack_field': self.db_pack_ind.id,
+            'given_field': False,
+            }
+
+    def test_get_stats_hit_and_miss(self):
+        """test second call reads report from cache"""
+        stats_cache = StatsCache(self.usertest)
+        stats = stats_cache.get_stats(self.lastday)
+        self.assertEqual(stats['total_smoke'], 0)
+        self.assertEqual(StatsCache.counters(), {'hits': 0, 'misses': 1})
+        with self.assertNumQueries(0):
+            stats = stats_cache.get_stats(self.lastday)
+        self.assertEqual(stats['count_no_smoking_day'], 10)
+        self.assertEqual(StatsCache.counters(), {'hits': 1, 'misses': 1})
+
+    def test_smoke_manager_invalidate_stats(self):
+        """test SmokeManager write paths bump user data version"""
+        stats_cache = StatsCache(self.usertest)
+        self.assertEqual(stats_cache.get_stats(self.lastday)['total_smoke'], 0)
+        smoke = SmokeManager(self.usertest, self.smoke_datas)
+        conso = smoke.create_conso_cig()
+        self.assertEqual(stats_cache.get_stats(self.lastday)['total_smoke'], 1)
+        SmokeManager(self.usertest, {'id_smoke': conso.id}).delete_conso_cig()
+        self.assertEqual(stats_cache.get_stats(self.lastday)['total_smoke'], 0)
+        self.assertEqual(StatsCache.counters(), {'hits': 0, 'misses': 3})
+
+    def test_reset_profile_invalidate_stats(self):
+        """test ResetProfile bumps user data version"""
+        stats_cache = StatsCache(self.usertest)
+        self.assertEqual(stats_cache.get_stats(self.lastday)['count_no_smoking_day'], 10)
+        reset = ResetProfile(
+            self.usertest, {'date_start': datetime.date(2020, 6, 6), 'starting_nb_cig': 10})
+        reset.new_profile()
+        self.assertEqual(stats_cache.get_stats(self.lastday)['count_no_smoking_day'], 5)
+
+    def test_version_per_user(self):
+        """test bumping a user version don't invalidate other users reports"""
+        other = User.objects.create_user(
+            'OtherUserTest', 'other@test.com', 'testpassword')
+        version = StatsCache(other).version
+        StatsCache(self.usertest).bump_version()
+        self.assertEqual(StatsCache(other).version, version)
+
+    def test_lost_version(self):
+        """test a version removed from cache is never an old one"""
+        stats_cache = StatsCache(self.usertest)
+        version = stats_cache.version
+        stats_cache.bump_version()
+        caches['stats'].delete(stats_cache.version_key)
+        self.assertTrue(stats_cache.version > version + 1)
+
+    def test_compute_all_stats_command(self):
+        """test compute_all_stats management command fills stats cache"""
+        other = User.objects.create_user(
+            'OtherUserTest', 'other@test.com', 'testpassword')
+        UserProfile.objects.create(
+            user=other,
+            date_start=datetime.date(2020, 6, 8),
+            starting_nb_cig=10
+        )
+        cache_settings = shared_stats_cache()
+        self.addCleanup(shutil.rmtree, cache_settings['stats']['LOCATION'])
+        with self.settings(CACHES=cache_settings):
+            call_command(
+                'compute_all_stats', workers=1, chunk_size=1, date=self.lastday,
+                stdout=open(os.devnull, 'w'))
+            self.assertEqual(StatsCache.counters(), {'hits': 0, 'misses': 0})
+            with self.assertNumQueries(0):
+                self.assertEqual(StatsCache(other).get_stats(self.lastday)['count_no_smoking_day'], 3)
+                self.assertEqual(StatsCache(self.usertest).get_stats(self.lastday)['total_smoke'], 0)
+            self.assertEqual(StatsCache.counters(), {'hits': 2, 'misses': 0})
+
+    @override_settings(CACHES={
+        'stats': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        })
+    def test_compute_all_stats_local_cache(self):
+        """test compute_all_stats refuses a cache private to its process"""
+        with self.assertRaises(CommandError):
+            call_command('compute_all_stats', workers=1, stdout=open(os.devnull, 'w'))
+
+    def test_compute_all_stats_small_cache(self):
+        """test compute_all_stats refuses a cache culled before holding all users"""
+        cache_settings = shared_stats_cache()
+        self.addCleanup(shutil.rmtree, cache_settings['stats']['LOCATION'])
+        cache_settings['stats']['OPTIONS'] = {'MAX_ENTRIES': 3}
+        with self.settings(CACHES=cache_settings):
+            with self.assertRaises(CommandError):
+                call_command('compute_all_stats', workers=1, stdout=open(os.devnull, 'w'))
+
+
+class ComputeAllStatsWorkersTestCase(TransactionTestCase):
+    """class testing compute_all_stats command with worker processes"""
+
+    def setUp(self):
+        """setup tests"""
+        cache_settings = shared_stats_cache()
+        self.addCleanup(shutil.rmtree, cache_settings['stats']['LOCATION'])
+        self.cache_settings = self.settings(CACHES=cache_settings)
+        self.cache_settings.enable()
+        self.addCleanup(self.cache_settings.disable)
+        self.lastday = datetime.date(2020, 6, 10)
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(
+                'NewUserTest{}'.format(i), 'test{}@test.com'.format(i), 'testpassword')
+            UserProfile.objects.create(
+                user=user,
+                date_start=datetime.date(2020, 6, 1 + i),
+                starting_nb_cig=20
+            )
+            self.users.append(user)
+
+    def test_compute_all_stats_workers(self):
+        """test stats computed by worker processes are read from shared cache"""
+        call_command(
+            'compute_all_stats', workers=2, chunk_size=1, date=self.lastday,
+            stdout=open(os.devnull, 'w'))
+        with self.assertNumQueries(0):
+            for i, user in enumerate(self.users):
+                stats = StatsCache(user).get_stats(self.lastday)
+                self.assertEqual(stats['count_no_smoking_day'], 10 - i)
+        self.assertEqual(StatsCache.counters(), {'hits': 3, 'misses': 0})
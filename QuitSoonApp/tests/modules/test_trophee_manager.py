@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+"""Module testing trophee_manager module"""
+
+import datetime
+import os
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import UserProfile, ConsoCig, Trophee, TropheeProgress
+from QuitSoonApp.modules import TropheeManager, SmokeManager
+
+
+class TropheeManagerTestCase(TestCase):
+    """class testing TropheeManager """
+
+    def setUp(self):
+        """setup tests"""
+        self.usertest = User.objects.create_user(
+            'NewUserTest', 'test@test.com', 'testpassword')
+        UserProfile.objects.create(
+            user=self.usertest,
+            date_start=datetime.date(2020, 6, 1),
+            starting_nb_cig=5,
+            )
+
+    def smoke(self, day):
+        smoke = SmokeManager(self.usertest, {
+            'date_smoke': day,
+            'time_smoke': datetime.time(10, 15),
+            'given_field': True,
+            })
+        return smoke.create_conso_cig()
+
+    def trophees(self):
+        return set(Trophee.objects.filter(user=self.usertest).values_list('nb_cig', 'nb_jour'))
+
+    def test_smoke_free_run_awarded_on_next_cigarette(self):
+        """test smoke free days trophies awarded when a cigarette ends the run"""
+        self.smoke(datetime.date(2020, 6, 1))
+        self.assertEqual(self.trophees(), set())
+        # 2020-06-02 to 2020-06-08 without smoking
+        self.smoke(datetime.date(2020, 6, 9))
+        self.assertEqual(self.trophees(), {(0, 1), (0, 2), (0, 3), (0, 7)})
+        progress = TropheeProgress.objects.get(user=self.usertest)
+        self.assertEqual(progress.last_smoke_date, datetime.date(2020, 6, 9))
+        self.assertEqual(progress.nb_cig, 2)
+        self.assertEqual(progress.days_level, 4)
+
+    def test_bulk_cigarettes(self):
+        """test trophies of bulk cigarettes, incremental after last smoking day"""
+        self.smoke(datetime.date(2020, 6, 1))
+        manager = SmokeManager(self.usertest, {
+            'date_smoke': datetime.date(2020, 6, 5),
+            'time_smoke': datetime.time(10, 15),
+            'given_field': True,
+            })
+        manager.create_bulk_conso_cig({datetime.date(2020, 6, 5): 2, datetime.date(2020, 6, 7): 1})
+        # 2020-06-02 to 2020-06-04 without smoking
+        self.assertEqual(self.trophees(), {(0, 1), (0, 2), (0, 3)})
+        progress = TropheeProgress.objects.get(user=self.usertest)
+        self.assertEqual(progress.last_smoke_date, datetime.date(2020, 6, 7))
+        self.assertEqual(progress.nb_cig, 4)
+        # backfill before last smoking day recomputes all trophies until today
+        manager.create_bulk_conso_cig({datetime.date(2020, 6, 3): 1})
+        self.assertTrue((10, 0) in self.trophees())
+        progress = TropheeProgress.objects.get(user=self.usertest)
+        self.assertEqual((progress.last_smoke_date, progress.nb_cig), (datetime.date(2020, 6, 7), 5))
+
+    def test_check(self):
+        """test trophies reached without any new cigarette"""
+        self.smoke(datetime.date(2020, 6, 1))
+        manager = TropheeManager(self.usertest)
+        new_trophees = manager.check(datetime.date(2020, 6, 4))
+        self.assertEqual(
+            [(trophee.nb_cig, trophee.nb_jour) for trophee in new_trophees],
+            # 3 days without smoking, 4 * 5 - 1 = 19 cigarettes avoided
+            [(0, 1), (0, 2), (0, 3), (10, 0)])
+        # already awarded trophies are not awarded again
+        self.assertEqual(manager.check(datetime.date(2020, 6, 4)), [])
+        self.assertEqual(len(self.trophees()), 4)
+
+    def test_check_queries(self):
+        """test checking progress doesn't read user history"""
+        for day in range(1, 20):
+            ConsoCig.objects.create(
+                user=self.usertest,
+                date_cig=datetime.date(2020, 6, day),
+                time_cig=datetime.time(10, 15),
+                given=True,
+                )
+        TropheeManager(self.usertest).check(datetime.date(2020, 6, 1))
+        # profile and progress
+        with self.assertNumQueries(2):
+            manager = TropheeManager(self.usertest)
+            self.assertEqual(manager.check(datetime.date(2020, 6, 1)), [])
+
+    def test_remove_conso_cig(self):
+        """test deleting last cigarette gives back previous smoking day"""
+        self.smoke(datetime.date(2020, 6, 1))
+        last = self.smoke(datetime.date(2020, 6, 3))
+        SmokeManager(self.usertest, {'id_smoke': last.id}).delete_conso_cig()
+        progress = TropheeProgress.objects.get(user=self.usertest)
+        self.assertEqual(progress.last_smoke_date, datetime.date(2020, 6, 1))
+        self.assertEqual(progress.nb_cig, 1)
+
+    def test_no_profile(self):
+        """test no trophies without userprofile"""
+        UserProfile.objects.filter(user=self.usertest).delete()
+        self.smoke(datetime.date(2020, 6, 1))
+        self.assertEqual(TropheeManager(self.usertest).check(), [])
+        self.assertFalse(TropheeProgress.objects.filter(user=self.usertest).exists())
+
+    def test_missing_progress(self):
+        """test progress of a user with history but no progress row is built from history"""
+        today = datetime.date.today()
+        UserProfile.objects.filter(user=self.usertest).update(
+            date_start=today - datetime.timedelta(days=99), starting_nb_cig=1)
+        for day in range(100):
+            ConsoCig.objects.create(
+                user=self.usertest,
+                date_cig=today - datetime.timedelta(days=day),
+                time_cig=datetime.time(10, 15),
+                given=True,
+                )
+        self.assertEqual(TropheeManager(self.usertest).check(), [])
+        self.assertEqual(self.trophees(), set())
+        progress = TropheeProgress.objects.get(user=self.usertest)
+        self.assertEqual((progress.last_smoke_date, progress.nb_cig), (today, 100))
+        # a new cigarette is counted once
+        TropheeProgress.objects.all().delete()
+        self.smoke(today)
+        self.assertEqual(TropheeProgress.objects.get(user=self.usertest).nb_cig, 101)
+        TropheeProgress.objects.all().delete()
+        SmokeManager(self.usertest, {'given_field': True}).create_bulk_conso_cig({today: 2})
+        self.assertEqual(TropheeProgress.objects.get(user=self.usertest).nb_cig, 103)
+        self.assertEqual(self.trophees(), set())
+
+    def test_rebuild(self):
+        """test trophies recomputed from raw history"""
+        for day in [1, 2, 10, 11, 12]:
+            ConsoCig.objects.create(
+                user=self.usertest,
+                date_cig=datetime.date(2020, 6, day),
+                time_cig=datetime.time(10, 15),
+                given=True,
+                )
+        Trophee.objects.create(user=self.usertest, nb_cig=0, nb_jour=365)
+        TropheeManager(self.usertest).rebuild(datetime.date(2020, 6, 12))
+        # longest run 2020-06-03 to 2020-06-09, 12 * 5 - 5 cigarettes avoided
+        self.assertEqual(
+            self.trophees(),
+            {(0, 1), (0, 2), (0, 3), (0, 7), (10, 0), (20, 0), (50, 0)})
+        progress = TropheeProgress.objects.get(user=self.usertest)
+        self.assertEqual(progress.last_smoke_date, datetime.date(2020, 6, 12))
+        self.assertEqual(progress.nb_cig, 5)
+        self.assertEqual((progress.days_level, progress.cig_level), (4, 3))
+
+    def test_rebuild_trophees_command(self):
+        """test rebuild_trophees command"""
+        call_command('rebuild_trophees', stdout=open(os.devnull, 'w'))
+        self.assertTrue(TropheeProgress.objects.filter(user=self.usertest).exists())
+        self.assertIn((0, 1), self.trophees())
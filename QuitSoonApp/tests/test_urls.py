@@ -5,9 +5,9 @@ from django.urls import resolve, reverse
 from QuitSoonApp.views import (
     index, today,
     register_view, login_view,
-    profile, new_name, new_email, new_password, new_parameters,
-    suivi, objectifs,
-    paquets, delete_pack, change_g_per_cig, smoke, delete_smoke,
+    profile, new_name, new_email, new_password, new_parameters, export_history,
+    suivi, timeseries, objectifs,
+    paquets, delete_pack, change_g_per_cig, smoke, delete_smoke, import_history,
     alternatives, delete_alternative, health, su_ecig, delete_health,
 )
 
@@ -122,3 +122,18 @@ class TestUrls(SimpleTestCase):
         """test delete_pack"""
         url = reverse('QuitSoonApp:delete_health', args=['id_health'])
         self.assertEqual(resolve(url).func, delete_health)
+
+    def test_export_history_url_is_resolved(self):
+        """test export_history"""
+        url = reverse('QuitSoonApp:export_history')
+        self.assertEqual(resolve(url).func, export_history)
+
+    def test_timeseries_url_is_resolved(self):
+        """test timeseries"""
+        url = reverse('QuitSoonApp:timeseries')
+        self.assertEqual(resolve(url).func, timeseries)
+
+    def test_import_history_url_is_resolved(self):
+        """test import_history"""
+        url = reverse('QuitSoonApp:import_history')
+        self.assertEqual(resolve(url).func, import_history)
@@ -2,6 +2,7 @@
 
 import datetime
 
+from django.core.cache import caches
 from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -21,6 +22,7 @@ class AlternativeAndHealthyTestCase(TestCase):
 
     def setUp(self):
         """setup tests"""
+        caches['stats'].clear()
         self.user = User.objects.create_user(
             'TestUser', 'test@test.com', 'testpassword')
         self.client.login(username=self.user.username, password='testpassword')
@@ -174,6 +176,7 @@ class HealthTestCase(TransactionTestCase):
 
     def setUp(self):
         """setup tests"""
+        caches['stats'].clear()
         self.usertest = User.objects.create_user(
             'NewUserTest', 'test@test.com', 'testpassword')
         self.client.login(username=self.usertest.username, password='testpassword')
@@ -240,13 +243,13 @@ class HealthTestCase(TransactionTestCase):
         Alternative.objects.filter(user=self.usertest).all().delete()
         response = self.client.get(reverse('QuitSoonApp:health'))
         self.assertEqual(response.status_code, 200)
-        self.assertFalse(response.context['alternatives'].exists())
+        self.assertFalse(response.context['alternatives'])
         self.assertFalse(response.context['health'].exists())
 
     def test_health_get_form(self):
         """ test get health view with alternatives saved by user, get form"""
         response = self.client.get(reverse('QuitSoonApp:health'))
-        self.assertTrue(response.context['alternatives'].exists())
+        self.assertTrue(response.context['alternatives'])
         self.assertTrue(response.context['health'].exists())
         self.assertTrue('form' in response.context)
 
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import Paquet
+
+
+class ConditionalViewsTestCase(TestCase):
+    """
+    Tests on ETag and gzip of user pages
+    """
+
+    def setUp(self):
+        """setup tests"""
+        caches['stats'].clear()
+        self.user = User.objects.create_user(
+            'TestUser', 'test@test.com', 'testpassword')
+        self.client.login(username=self.user.username, password='testpassword')
+
+    def get_etag(self, url):
+        # first visit without csrf cookie, it is created with the ETag
+        self.client.cookies.pop(settings.CSRF_COOKIE_NAME, None)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_not_modified(self):
+        """Test page not rendered again if user datas didn't change"""
+        for name in ['smoke', 'health', 'paquets', 'alternatives', 'profile', 'suivi', 'timeseries']:
+            url = reverse('QuitSoonApp:' + name)
+            etag = self.get_etag(url)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+
+    def test_modified_after_write(self):
+        """Test ETag changes when user saves a new pack"""
+        url = reverse('QuitSoonApp:paquets')
+        etag = self.get_etag(url)
+        self.client.post(url, {
+            'type_cig': 'IND',
+            'brand': 'Camel',
+            'qt_paquet': '20',
+            'price': '10',
+            })
+        self.assertTrue(Paquet.objects.filter(user=self.user).exists())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_per_user(self):
+        """Test another user doesn't get the same ETag"""
+        url = reverse('QuitSoonApp:paquets')
+        etag = self.get_etag(url)
+        User.objects.create_user('OtherUser', 'other@test.com', 'testpassword')
+        self.client.login(username='OtherUser', password='testpassword')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_no_etag(self):
+        """Test no ETag for anonymous users"""
+        self.client.logout()
+        response = self.client.get(reverse('QuitSoonApp:paquets'))
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_gzip(self):
+        """Test pages compressed for clients accepting gzip"""
+        response = self.client.get(reverse('QuitSoonApp:paquets'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
@@ -3,6 +3,8 @@
 from decimal import Decimal
 import datetime
 
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -22,6 +24,7 @@ class PacksAndSmokeTestCase(TestCase):
 
     def setUp(self):
         """setup tests"""
+        caches['stats'].clear()
         self.user = User.objects.create_user(
             'TestUser', 'test@test.com', 'testpassword')
         self.client.login(username=self.user.username, password='testpassword')
@@ -131,7 +134,7 @@ class PacksAndSmokeTestCase(TestCase):
         """ test get smoke view with no pack saved by user """
         response = self.client.get(reverse('QuitSoonApp:smoke'))
         self.assertEqual(response.status_code, 200)
-        self.assertFalse(response.context['packs'].exists())
+        self.assertFalse(response.context['packs'])
         self.assertFalse(response.context['smoke'].exists())
 
     def test_smoke_get_form(self):
@@ -144,7 +147,7 @@ class PacksAndSmokeTestCase(TestCase):
             price=10,
             )
         response = self.client.get(reverse('QuitSoonApp:smoke'))
-        self.assertTrue(response.context['packs'].exists())
+        self.assertTrue(response.context['packs'])
         self.assertFalse(response.context['smoke'].exists())
         self.assertTrue('form' in response.context)
 
@@ -210,6 +213,30 @@ class PacksAndSmokeTestCase(TestCase):
         self.assertTrue(filter_smoke.exists())
         self.assertEqual(filter_smoke.count(), 1)
 
+    def test_smoke_post_bulk(self):
+        """ test post smoke view with several cigarettes per day on a date range """
+        db_pack_ind = Paquet.objects.create(
+            user=self.user,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            )
+        data = {
+            'date_smoke':datetime.date(2020, 5, 20),
+            'time_smoke':datetime.time(12, 56),
+            'date_end':datetime.date(2020, 5, 26),
+            'nb_cig':12,
+            'type_cig_field':'IND',
+            'ind_pack_field':db_pack_ind.id,
+            'given_field':False,
+            }
+        response = self.client.post(reverse('QuitSoonApp:smoke'), data=data)
+        self.assertEqual(response.status_code, 200)
+        filter_smoke = ConsoCig.objects.filter(user=self.user, paquet=db_pack_ind)
+        self.assertEqual(filter_smoke.count(), 7 * 12)
+        self.assertEqual(filter_smoke.filter(date_cig=datetime.date(2020, 5, 26)).count(), 12)
+
     def test_delete_smoke_fail(self):
         """ test get delete_smoke view with unexisting ConsoCig """
         response = self.client.post(reverse(
@@ -256,3 +283,73 @@ class PacksAndSmokeTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         filter_conso = ConsoCig.objects.filter(user=self.user, id=id)
         self.assertFalse(filter_conso.exists())
+
+
+class ImportHistoryTestCase(TestCase):
+    """
+    Tests on import_history page
+    """
+
+    def setUp(self):
+        """setup tests"""
+        caches['stats'].clear()
+        self.user = User.objects.create_user(
+            'TestUser', 'test@test.com', 'testpassword')
+        self.client.login(username=self.user.username, password='testpassword')
+        Paquet.objects.create(
+            user=self.user,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            price_per_cig=0.5,
+            )
+
+    def test_import_history_get(self):
+        """Test get import_history view"""
+        response = self.client.get(reverse('QuitSoonApp:import_history'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'QuitSoonApp/import_history.html')
+
+    def test_import_history_post(self):
+        """Test client post a csv file"""
+        csv_file = SimpleUploadedFile(
+            'history.csv', b'2020-06-17,10:15,CAMEL\n2020-06-17,11:15,\n', content_type='text/csv')
+        response = self.client.post(reverse('QuitSoonApp:import_history'), {'csv_file': csv_file})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['nb_created'], 2)
+        self.assertEqual(ConsoCig.objects.filter(user=self.user).count(), 2)
+
+    def test_import_history_post_errors(self):
+        """Test client post a csv file with invalid rows"""
+        csv_file = SimpleUploadedFile(
+            'history.csv', b'2020-06-17,10:15,CAMEL\n2020-06-17,11:15,LUCKY\n', content_type='text/csv')
+        response = self.client.post(reverse('QuitSoonApp:import_history'), {'csv_file': csv_file})
+        self.assertEqual(response.context['errors'][0][0], 2)
+        self.assertFalse(ConsoCig.objects.filter(user=self.user).exists())
+
+    def test_import_history_post_windows_1252(self):
+        """Test client post a csv file exported in Windows-1252 by a spreadsheet"""
+        Paquet.objects.create(
+            user=self.user,
+            type_cig='ROL',
+            brand='GAULOISE É',
+            qt_paquet=30,
+            price=12,
+            price_per_cig=0.4,
+            )
+        csv_file = SimpleUploadedFile(
+            'history.csv', 'date,heure,paquet\n2020-06-17,10:15,GAULOISE É\n'.encode('cp1252'),
+            content_type='text/csv')
+        response = self.client.post(reverse('QuitSoonApp:import_history'), {'csv_file': csv_file})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['nb_created'], 1)
+
+    def test_import_history_post_undecodable(self):
+        """Test client post a file in an unknown encoding gets a form error"""
+        csv_file = SimpleUploadedFile(
+            'history.csv', b'2020-06-17,10:15,\x81\x8d\n', content_type='text/csv')
+        response = self.client.post(reverse('QuitSoonApp:import_history'), {'csv_file': csv_file})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue('csv_file' in response.context['form'].errors)
+        self.assertFalse(ConsoCig.objects.filter(user=self.user).exists())
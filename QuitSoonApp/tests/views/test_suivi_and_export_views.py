@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+import datetime
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from QuitSoonApp.models import UserProfile, Paquet, ConsoCig
+from QuitSoonApp.modules import LedgerManager
+
+
+class SuiviTestCase(TestCase):
+    """
+    Tests on suivi page
+    """
+
+    def setUp(self):
+        """setup tests"""
+        caches['stats'].clear()
+        self.user = User.objects.create_user(
+            'TestUser', 'test@test.com', 'testpassword')
+        self.client.login(username=self.user.username, password='testpassword')
+        self.pack = Paquet.objects.create(
+            user=self.user,
+            type_cig='IND',
+            brand='CAMEL',
+            qt_paquet=20,
+            price=10,
+            price_per_cig=0.5,
+            )
+        for day in range(3):
+            ConsoCig.objects.create(
+                user=self.user,
+                date_cig=datetime.date.today() - datetime.timedelta(days=day),
+                time_cig=datetime.time(10 + day, 15),
+                paquet=self.pack,
+                )
+        LedgerManager(self.user).rebuild()
+
+    def test_suivi_view_no_profile(self):
+        """Test get suivi view without userprofile"""
+        response = self.client.get(reverse('QuitSoonApp:suivi'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'QuitSoonApp/suivi.html')
+        self.assertFalse('smoke_stats' in response.context)
+
+    def test_suivi_view(self):
+        """Test get suivi view with userprofile"""
+        UserProfile.objects.create(
+            user=self.user,
+            date_start=datetime.date.today() - datetime.timedelta(days=9),
+            starting_nb_cig=20
+        )
+        response = self.client.get(reverse('QuitSoonApp:suivi'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['smoke_stats']['total_smoke'], 3)
+        self.assertEqual(response.context['smoke_stats']['count_no_smoking_day'], 7)
+        self.assertEqual(sum(sum(counts) for weekday, counts in response.context['heatmap']), 3)
+        # pack nicotine unknown, default mg per cigarette
+        self.assertAlmostEqual(response.context['nicotine'].average_per_day, 0.3)
+        self.assertEqual(len(response.context['forecast']), 7)
+        self.assertEqual(
+            response.context['forecast'][0]['date'], datetime.date.today() + datetime.timedelta(days=1))
+
+
+class TimeseriesTestCase(TestCase):
+    """
+    Tests on timeseries view
+    """
+
+    def setUp(self):
+        """setup tests"""
+        self.user = User.objects.create_user(
+            'TestUser', 'test@test.com', 'testpassword')
+        for day in [1, 2, 2, 9, 30]:
+            ConsoCig.objects.create(
+                user=self.user,
+                date_cig=datetime.date(2020, 6, day),
+                time_cig=datetime.time(10, 15),
+                given=True,
+                )
+        LedgerManager(self.user).rebuild()
+        self.url = reverse('QuitSoonApp:timeseries')
+
+    def test_timeseries_anonymous(self):
+        """Test timeseries view without logged user"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_timeseries_per_day(self):
+        """Test timeseries view with one point per day"""
+        self.client.login(username=self.user.username, password='testpassword')
+        response = self.client.get(self.url, {'start': '2020-06-01', 'end': '2020-06-30'})
+        self.assertEqual(response.status_code, 200)
+        series = response.json()
+        self.assertEqual(series['bucket'], 'day')
+        self.assertEqual(
+            [(point['date'], point['nb_cig']) for point in series['points']],
+            [('2020-06-01', 1), ('2020-06-02', 2), ('2020-06-09', 1), ('2020-06-30', 1)])
+
+    def test_timeseries_max_points(self):
+        """Test timeseries view bucket chosen from max_points"""
+        self.client.login(username=self.user.username, password='testpassword')
+        response = self.client.get(
+            self.url, {'start': '2020-06-01', 'end': '2020-06-30', 'max_points': 5})
+        series = response.json()
+        self.assertEqual(series['bucket'], 'week')
+        # weeks starting on monday
+        self.assertEqual(
+            [(point['date'], point['nb_cig']) for point in series['points']],
+            [('2020-06-01', 3), ('2020-06-08', 1), ('2020-06-29', 1)])
+        response = self.client.get(
+            self.url, {'start': '2020-06-01', 'end': '2020-06-30', 'max_points': 1})
+        series = response.json()
+        self.assertEqual(series['bucket'], 'month')
+        self.assertEqual(
+            [(point['date'], point['nb_cig']) for point in series['points']],
+            [('2020-06-01', 5)])
+
+
+class ExportHistoryTestCase(TestCase):
+    """
+    Tests on export_history view
+    """
+
+    def setUp(self):
+        """setup tests"""
+        self.user = User.objects.create_user(
+            'TestUser', 'test@test.com', 'testpassword')
+        for day in range(3):
+            ConsoCig.objects.create(
+                user=self.user,
+                date_cig=datetime.date(2020, 6, 1 + day),
+                time_cig=datetime.time(10, 15),
+                given=True,
+                )
+
+    def test_export_history_anonymous(self):
+        """Test export_history view with anonymous user"""
+        response = self.client.get(reverse('QuitSoonApp:export_history'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_history_csv(self):
+        """Test export_history view streams csv"""
+        self.client.login(username=self.user.username, password='testpassword')
+        response = self.client.get(reverse('QuitSoonApp:export_history'), {'start': '2020-06-02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_export_history_ndjson(self):
+        """Test export_history view streams ndjson"""
+        self.client.login(username=self.user.username, password='testpassword')
+        response = self.client.get(reverse('QuitSoonApp:export_history'), {'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_export_history_unknown_format(self):
+        """Test export_history view with unknown format"""
+        self.client.login(username=self.user.username, password='testpassword')
+        response = self.client.get(reverse('QuitSoonApp:export_history'), {'format': 'xls'})
+        self.assertEqual(response.status_code, 404)
@@ -182,6 +182,21 @@ class UserProfileTestCase(TransactionTestCase):
         self.assertTemplateUsed(response, 'QuitSoonApp/profile.html')
         self.assertEqual(response.context['userprofile'], userprofile)
 
+    def test_today_new_trophees(self):
+        """test today page displays smoke free days trophies once, when reached"""
+        UserProfile.objects.create(
+            user=self.user,
+            date_start=datetime.date.today() - datetime.timedelta(days=1),
+            starting_nb_cig=3
+        )
+        self.client.login(username=self.user.username, password='testpassword')
+        response = self.client.get(reverse('QuitSoonApp:today'))
+        self.assertEqual(len(response.context['new_trophees']), 2)
+        self.assertContains(response, '2 jours sans fumer')
+        response = self.client.get(reverse('QuitSoonApp:today'))
+        self.assertEqual(response.context['new_trophees'], [])
+        self.assertNotContains(response, 'Nouveau')
+
     def test_new_name(self):
         """test change nameview"""
         self.client.login(username=self.user.username, password='testpassword')
@@ -13,6 +13,7 @@ urlpatterns = [
 
     path('today/', views.today, name='today'),
     path('suivi/', views.suivi, name='suivi'),
+    path('timeseries/', views.timeseries, name='timeseries'),
     path('objectifs/', views.objectifs, name='objectifs'),
 
     path('paquets/', views.paquets, name='paquets'),
@@ -22,6 +23,7 @@ urlpatterns = [
     path('change_g_per_cig/', views.change_g_per_cig, name='change_g_per_cig'),
     path('smoke/', views.smoke, name='smoke'),
     path('delete_smoke/<id_smoke>/', views.delete_smoke, name='delete_smoke'),
+    path('import_history/', views.import_history, name='import_history'),
 
     path('alternatives/', views.alternatives, name='alternatives'),
     path('delete_alternative/<id_alternative>/',
@@ -36,5 +38,6 @@ urlpatterns = [
     path('new_email/', views.new_email, name='new_email'),
     path('new_password/', views.new_password, name='new_password'),
     path('new_parameters/', views.new_parameters, name='new_parameters'),
+    path('export_history/', views.export_history, name='export_history'),
 
 ]
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import hashlib
 from datetime import date
 from decimal import Decimal
 
@@ -7,7 +8,11 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, update_session_auth_hash
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse, JsonResponse, Http404
+from django.http import HttpResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.utils.dateparse import parse_date
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 from django.contrib.auth.models import User
 
 from .models import (
@@ -25,9 +30,51 @@ from .forms import (
     ActivityForm,
     SubstitutForm,
     SmokeForm,
+    HistoryImportForm,
     HealthForm,
     )
-from .modules import ResetProfile, PackManager, SmokeManager, AlternativeManager, HealthManager
+from .modules import (
+    ResetProfile,
+    PackManager,
+    SmokeManager,
+    AlternativeManager,
+    HealthManager,
+    LedgerManager,
+    TropheeManager,
+    StatsCache,
+    CatalogCache,
+    SmokeHeatmap,
+    NicotineIntake,
+    SmokeTimeseries,
+    SmokeForecast,
+    HistoryExport,
+    HistoryImport,
+    )
+
+def get_date_param(request, name):
+    """get a date from request GET parameters, None if missing or invalid"""
+    try:
+        return parse_date(request.GET.get(name, ''))
+    except ValueError:
+        return None
+
+def user_data_etag(request, *args, **kwargs):
+    """
+    ETag of pages only showing user datas, None for anonymous users.
+    Changes with user data version bumped on each write, with the day (default
+    dates of forms) and with csrf cookie of rendered forms, created here on the
+    first visit so that the next request sends it back with the same ETag
+    """
+    if not request.user.is_authenticated:
+        return None
+    get_token(request)
+    key = '{}:{}:{}:{}'.format(
+        request.user.id,
+        StatsCache(request.user).version,
+        date.today().isoformat(),
+        request.META['CSRF_COOKIE'],
+        )
+    return hashlib.sha1(key.encode()).hexdigest()
 
 def index(request):
     """index View"""
@@ -66,8 +113,16 @@ def login_view(request):
 
 def today(request):
     """Welcome page if user.is_authenticated. Actions for the day"""
-    return render(request, 'QuitSoonApp/today.html')
-
+    context = {}
+    if request.user.is_authenticated:
+        if UserProfile.objects.filter(user=request.user).exists():
+            context['smoke_stats'] = StatsCache(request.user).get_stats(date.today())
+            # smoke free days trophies are reached without any new cigarette
+            context['new_trophees'] = TropheeManager(request.user).check()
+    return render(request, 'QuitSoonApp/today.html', context)
+
+@gzip_page
+@condition(etag_func=user_data_etag)
 def profile(request):
     """User profile page with authentication infos and smoking habits"""
     context = {'userprofile':None}
@@ -91,6 +146,7 @@ def new_name(request):
         else:
             user.username = new_name_user
             user.save()
+            StatsCache(user).bump_version()
             if user.username == new_name_user:
                 response_data = {'response':"success", 'name':user.username}
             else:
@@ -110,6 +166,7 @@ def new_email(request):
         else:
             user.email = new_email_user
             user.save()
+            StatsCache(user).bump_version()
             if user.email == new_email_user:
                 response_data = {'response':"success"}
             else:
@@ -154,6 +211,8 @@ def new_parameters(request):
         raise Http404()
     return HttpResponse(JsonResponse(response_data))
 
+@gzip_page
+@condition(etag_func=user_data_etag)
 def paquets(request):
     """Smoking parameters, user different packs"""
     context = {}
@@ -181,10 +240,9 @@ def delete_pack(request, id_pack):
     Used when user click on the trash of one of the paquet
     Don't delete it but change display attribute into False if already used
     """
-    if Paquet.objects.filter(user=request.user, id=id_pack).exists():
-        data = {'id_pack':id_pack}
-        new_pack = PackManager(request.user, data)
-        new_pack.delete_pack()
+    data = {'id_pack':id_pack}
+    new_pack = PackManager(request.user, data)
+    if new_pack.delete_pack():
         return redirect('QuitSoonApp:paquets')
     else:
         raise Http404()
@@ -204,19 +262,26 @@ def change_g_per_cig(request):
     return redirect('QuitSoonApp:paquets')
 
 
+@gzip_page
+@condition(etag_func=user_data_etag)
 def smoke(request):
     """User smokes"""
     # check if packs are in parameters to fill fields with actual packs
-    packs = Paquet.objects.filter(user=request.user, display=True)
+    packs = CatalogCache(request.user).packs
     context = {'packs':packs}
     if packs :
-        form = SmokeForm(request.user)
         if request.method == 'POST':
             form = SmokeForm(request.user, request.POST)
             if form.is_valid():
-                smoke = SmokeManager(request.user, form.cleaned_data)
-                smoke.create_conso_cig()
+                smoke = SmokeManager(request.user, form.cleaned_data, form.selected_pack)
+                if smoke.is_bulk:
+                    smoke.create_bulk_conso_cig()
+                else:
+                    smoke.create_conso_cig()
+                # new empty form, with last smoke as default
                 form = SmokeForm(request.user)
+        else:
+            form = SmokeForm(request.user)
         context['form'] = form
     smoke = ConsoCig.objects.filter(user=request.user)
     context['smoke'] = smoke
@@ -234,6 +299,24 @@ def delete_smoke(request, id_smoke):
     else:
         raise Http404()
 
+def import_history(request):
+    """User imports his cigarettes history from a csv file"""
+    context = {}
+    if request.user.is_authenticated:
+        form = HistoryImportForm()
+        if request.method == 'POST':
+            form = HistoryImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                history = HistoryImport(request.user, form.cleaned_data['csv_file'])
+                history.run()
+                context['errors'] = history.errors
+                context['nb_created'] = history.nb_created
+                form = HistoryImportForm()
+        context['form'] = form
+    return render(request, 'QuitSoonApp/import_history.html', context)
+
+@gzip_page
+@condition(etag_func=user_data_etag)
 def alternatives(request):
     """Healthy parameters, user different activities or substitutes"""
     context = {}
@@ -300,29 +383,31 @@ def delete_alternative(request, id_alternative):
     Used when user click on the trash of one of the alternative
     Don't delete it but change display attribute into False if already used in ConsoAlternative
     """
-    if Alternative.objects.filter(user=request.user, id=id_alternative).exists():
-        data = {'id_alternative': id_alternative}
-        new_alternative = AlternativeManager(request.user, data)
-        new_alternative.delete_alternative()
+    data = {'id_alternative': id_alternative}
+    new_alternative = AlternativeManager(request.user, data)
+    if new_alternative.delete_alternative():
         return redirect('QuitSoonApp:alternatives')
     else:
         raise Http404()
 
+@gzip_page
+@condition(etag_func=user_data_etag)
 def health(request):
     """User do a healthy activity or uses substitutes"""
     context = {}
     if request.user.is_authenticated:
         # check if packs are in parameters to fill fields with actual packs
-        alternatives = Alternative.objects.filter(user=request.user, display=True)
+        alternatives = CatalogCache(request.user).displayed_alternatives
         context['alternatives'] = alternatives
         if alternatives :
-            form = HealthForm(request.user)
             if request.method == 'POST':
                 form = HealthForm(request.user, request.POST)
                 if form.is_valid():
-                    new_health = HealthManager(request.user, form.cleaned_data)
+                    new_health = HealthManager(request.user, form.cleaned_data, form.selected_alternative)
                     new_health.create_conso_alternative()
                     form = HealthForm(request.user)
+            else:
+                form = HealthForm(request.user)
             context['form'] = form
         health = ConsoAlternative.objects.filter(user=request.user)
         context['health'] = health
@@ -336,7 +421,7 @@ def su_ecig(request):
             substitut = int(request.GET['su_field'].split('=',1)[1])
 
             if type_alternative == 'Su':
-                if Alternative.objects.get(id=substitut).substitut == 'ECIG':
+                if substitut in CatalogCache(request.user).ecig_ids:
                     return HttpResponse(JsonResponse({'response':'true'}))
             return HttpResponse(JsonResponse({'response':'false'}))
         except:
@@ -357,9 +442,61 @@ def delete_health(request, id_health):
     else:
         raise Http404()
 
+@gzip_page
+@condition(etag_func=user_data_etag)
 def suivi(request):
     """Page with user results, graphs..."""
-    return render(request, 'QuitSoonApp/suivi.html')
+    context = {}
+    if request.user.is_authenticated:
+        if UserProfile.objects.filter(user=request.user).exists():
+            context['smoke_stats'] = StatsCache(request.user).get_stats(date.today())
+            context['health_totals'] = LedgerManager(request.user).totals()
+            context['nicotine'] = NicotineIntake(
+                request.user, context['smoke_stats']['date_start'], date.today())
+            forecast = SmokeForecast.get(request.user, date.today())
+            context['zero_date'] = forecast.zero_date()
+            context['forecast'] = forecast.forecast(7)
+            context['heatmap'] = SmokeHeatmap(request.user).rows
+            context['hours'] = range(24)
+    return render(request, 'QuitSoonApp/suivi.html', context)
+
+@gzip_page
+@condition(etag_func=user_data_etag)
+def timeseries(request):
+    """JSON points of user consumption per day, week or month for suivi charts"""
+    if not request.user.is_authenticated:
+        raise Http404()
+    lastday = get_date_param(request, 'end') or date.today()
+    date_start = get_date_param(request, 'start')
+    if not date_start:
+        userprofile = UserProfile.objects.filter(user=request.user).first()
+        date_start = userprofile.date_start if userprofile else lastday
+    try:
+        max_points = int(request.GET.get('max_points', SmokeTimeseries.MAX_POINTS))
+    except ValueError:
+        max_points = SmokeTimeseries.MAX_POINTS
+    series = SmokeTimeseries(
+        request.user, date_start, lastday, max_points, request.GET.get('bucket'))
+    return JsonResponse(series.as_dict())
+
+def export_history(request):
+    """Stream user history of cigarettes and healthy actions as csv or ndjson"""
+    if not request.user.is_authenticated:
+        raise Http404()
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in HistoryExport.FORMATS:
+        raise Http404()
+    export = HistoryExport(
+        request.user,
+        get_date_param(request, 'start'),
+        get_date_param(request, 'end'),
+        )
+    response = StreamingHttpResponse(
+        export.lines(export_format),
+        content_type=HistoryExport.FORMATS[export_format],
+        )
+    response['Content-Disposition'] = 'attachment; filename="quitsoon_history.{}"'.format(export_format)
+    return response
 
 def objectifs(request):
     """Page with user trophees and goals"""
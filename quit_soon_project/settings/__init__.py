@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import sys
+
 from dotenv import load_dotenv
 
 
@@ -53,6 +55,49 @@ DATABASES = {
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# 'stats' cache backend is choosen with STATS_CACHE_BACKEND : db (default), file, memcached or locmem
+# (db backend needs "./manage.py createcachetable")
+# stats versions and catalogs are invalidated in the cache shared by all server workers:
+# locmem is private to one process, only use it with a single worker
+# each user has a version, stats, catalog and forecast key: an evicted version invalidates
+# all user entries, so STATS_CACHE_MAX_ENTRIES is sized for all users (culling lists every
+# file of the file backend on each set, prefer db for many users)
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'quitsoon-stats'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(os.path.dirname(BASE_DIR), 'cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'quitsoon_stats_cache'),
+    'memcached': ('django.core.cache.backends.memcached.MemcachedCache', '127.0.0.1:11211'),
+}
+# backends shared between processes, required by compute_all_stats
+SHARED_CACHE_BACKENDS = [CACHE_BACKENDS[name][0] for name in ['file', 'db', 'memcached']]
+STATS_CACHE = os.getenv("STATS_CACHE_BACKEND", 'db')
+STATS_CACHE_MAX_ENTRIES = int(os.getenv("STATS_CACHE_MAX_ENTRIES", 400000))
+STATS_CACHE_BACKEND, STATS_CACHE_LOCATION = CACHE_BACKENDS[STATS_CACHE]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'stats': {
+        'BACKEND': STATS_CACHE_BACKEND,
+        'LOCATION': os.getenv("STATS_CACHE_LOCATION", STATS_CACHE_LOCATION),
+        'TIMEOUT': 60 * 60 * 24,
+    },
+}
+if STATS_CACHE != 'memcached':
+    # memcached evicts by itself, its OPTIONS are given to the client
+    CACHES['stats']['OPTIONS'] = {'MAX_ENTRIES': STATS_CACHE_MAX_ENTRIES}
+
+# tests clear the stats cache, keep them off the cache of the running server
+if sys.argv[1:2] == ['test']:
+    CACHES['stats'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quitsoon-stats-test',
+    }
+
 # Application definition
 
 INSTALLED_APPS = [